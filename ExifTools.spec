@@ -13,7 +13,7 @@ datas = [
 binaries = []
 hiddenimports = []
 
-for pkg in ("birder", "torch", "torchvision"):
+for pkg in ("birder", "torch", "torchvision", "onnxruntime"):
     tmp = collect_all(pkg)
     datas += tmp[0]
     binaries += tmp[1]
@@ -37,7 +37,7 @@ def main():
 
     # Modifier la recherche de mise à jour
     update_file(
-        'editor/app.py',
+        'editor/shared_data.py',
         r'VERSION = "[\d\.]+"',
         f'VERSION = "{version}"'
     )
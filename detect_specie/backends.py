@@ -0,0 +1,172 @@
+"""
+Moteurs d'inférence du modèle d'espèces.
+
+- TorchBackend : le réseau birder chargé en PyTorch (premier lancement, ou ONNX Runtime absent) ;
+- OnnxBackend : le même réseau exporté une fois en ONNX à côté des poids, exécuté par ONNX Runtime
+  sur CPU. Ni torch ni birder ne sont importés : le modèle est prêt en quelques secondes.
+
+Les deux exposent infer(chemin, transform) -> probabilités, infer_batch(lot) -> probabilités,
+et transform(model_info) -> transformation d'entrée adaptée.
+"""
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+
+@dataclass(frozen=True)
+class CachedModelInfo:
+    """Sous-ensemble de birder ModelInfo utilisé par l'application, relu depuis le JSON du modèle exporté."""
+    class_to_idx: dict
+    signature: dict
+    rgb_stats: dict
+
+
+def size_from_signature(signature):
+    """(hauteur, largeur) d'entrée du réseau, comme birder.get_size_from_signature."""
+    return tuple(signature["inputs"][0]["data_shape"][2:4])
+
+
+class NumpyTransform:
+    """
+    Équivalent NumPy de birder.classification_transform (redimensionnement bicubique à la taille
+    d'entrée, mise à l'échelle [0, 1], normalisation) : renvoie un tableau float32 CHW.
+    Classe de module plutôt que fermeture : elle se transmet aux processus de décodage (spawn).
+    """
+
+    def __init__(self, size, rgb_stats):
+        self.height, self.width = size
+        self.mean = np.asarray(rgb_stats["mean"], dtype=np.float32).reshape(3, 1, 1)
+        self.std = np.asarray(rgb_stats["std"], dtype=np.float32).reshape(3, 1, 1)
+
+    def __call__(self, image):
+        image = image.convert("RGB").resize((self.width, self.height), Image.Resampling.BICUBIC)
+        x = np.asarray(image, dtype=np.float32).transpose(2, 0, 1) / 255.0
+        return (x - self.mean) / self.std
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    e = np.exp(logits)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, net, export_net=None):
+        self.net = net
+        # Réseau fp32 d'origine, seul exportable en ONNX (net peut être sa version quantifiée)
+        self.export_net = export_net or net
+
+    def transform(self, model_info):
+        import birder
+
+        size = birder.get_size_from_signature(model_info.signature)
+        return birder.classification_transform(size, model_info.rgb_stats)
+
+    def infer(self, image_path, transform):
+        from birder.inference.classification import infer_image
+
+        out, _ = infer_image(self.net, image_path, transform)
+        return out[0]
+
+    def infer_batch(self, batch):
+        import torch
+
+        device = next(self.net.parameters()).device
+        with torch.inference_mode():
+            logits = self.net(torch.as_tensor(batch).to(device))
+            return torch.nn.functional.softmax(logits, dim=1).cpu().numpy()
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, onnx_path, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(onnx_path), options, providers=["CPUExecutionProvider"])
+        self._input = self.session.get_inputs()[0].name
+
+    def transform(self, model_info):
+        return NumpyTransform(size_from_signature(model_info.signature), model_info.rgb_stats)
+
+    def infer(self, image_path, transform):
+        with Image.open(image_path) as image:
+            x = np.asarray(transform(image), dtype=np.float32)
+        return self.infer_batch(x[None])[0]
+
+    def infer_batch(self, batch):
+        logits = self.session.run(None, {self._input: np.asarray(batch, dtype=np.float32)})[0]
+        return _softmax(logits)
+
+
+# ---------- Modèle exporté ----------
+
+def onnx_available():
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def load_exported_info(info_path, expected_key):
+    """model_info du modèle exporté, ou None s'il est absent ou ne correspond plus aux poids (expected_key)."""
+    try:
+        with open(info_path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("model_key") != expected_key:
+        return None
+    return CachedModelInfo(data["class_to_idx"], data["signature"], data["rgb_stats"])
+
+
+def export_onnx(net, model_info, onnx_path, info_path, key):
+    """
+    Exporte le réseau en ONNX (taille de lot dynamique) et son model_info en JSON. Les fichiers sont
+    écrits à côté puis renommés : un export interrompu ne laisse jamais d'artefact partiel.
+    """
+    import torch
+
+    height, width = size_from_signature(model_info.signature)
+    dummy = torch.zeros(1, 3, height, width, device=next(net.parameters()).device)
+    folder = os.path.dirname(onnx_path)
+
+    fd, tmp_onnx = tempfile.mkstemp(dir=folder, suffix=".onnx.tmp")
+    os.close(fd)
+    try:
+        with torch.inference_mode():
+            torch.onnx.export(
+                net,
+                (dummy,),
+                tmp_onnx,
+                input_names=["input"],
+                output_names=["logits"],
+                dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+            )
+        os.replace(tmp_onnx, onnx_path)
+    except BaseException:
+        if os.path.exists(tmp_onnx):
+            os.remove(tmp_onnx)
+        raise
+
+    info = {
+        "model_key": key,
+        "class_to_idx": dict(model_info.class_to_idx),
+        "signature": model_info.signature,
+        "rgb_stats": {k: list(v) for k, v in model_info.rgb_stats.items()},
+    }
+    fd, tmp_info = tempfile.mkstemp(dir=folder, suffix=".json.tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    os.replace(tmp_info, info_path)
@@ -0,0 +1,193 @@
+"""
+Reconnaissance d'espèce sur un dossier entier, par lots.
+
+    python -m detect_specie.batch DOSSIER... [--batch-size 16] [--workers 4] [--prefix] [--output resultats.csv]
+
+Les images sont décodées et transformées en parallèle pendant que le réseau (ONNX Runtime si le
+modèle exporté existe, PyTorch sinon) traite le lot précédent : par un DataLoader avec PyTorch, par
+un pool de threads avec ONNX Runtime, qui n'importe pas torch. Les prédictions vont dans le même
+cache que l'éditeur.
+"""
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from detect_specie.inference_server import InferenceServer
+from detect_specie.main import rank_specie
+from detect_specie.prediction_cache import TopK, content_hash
+from detect_specie.quantize import DEFAULT_PRECISION, PRECISIONS
+from detect_specie.range_index import SpeciesRangeIndex
+from editor.cli import collect_paths
+from editor.exif_editor_service import ExifEditorService
+from editor.exif_utils import read_metadata, with_name_prefix
+from editor.shared_data import StyleData
+
+
+class _ImageDataset:
+    def __init__(self, paths, transform):
+        self.paths = paths
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        try:
+            with Image.open(self.paths[index]) as image:
+                return index, self.transform(image.convert("RGB"))
+        except Exception:
+            return index, None
+
+
+def _collate(items):
+    ok = [(i, t) for i, t in items if t is not None]
+    failed = [i for i, t in items if t is None]
+    if not ok:
+        return [], None, failed
+    indices, tensors = zip(*ok)
+    return list(indices), np.stack([np.asarray(t) for t in tensors]), failed
+
+
+def _batches(paths, transform, batch_size, workers, use_torch):
+    """Lots (indices, tableau, indices illisibles), décodés pendant que le lot précédent est traité."""
+    dataset = _ImageDataset(paths, transform)
+    if use_torch:
+        from torch.utils.data import DataLoader
+
+        yield from DataLoader(
+            dataset,
+            batch_size=batch_size,
+            num_workers=workers,
+            collate_fn=_collate,
+            pin_memory=False,
+            persistent_workers=False,
+        )
+        return
+
+    # Décodage et redimensionnement PIL relâchent le GIL : des threads suffisent
+    chunks = [range(start, min(start + batch_size, len(dataset))) for start in range(0, len(dataset), batch_size)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = [pool.map(dataset.__getitem__, chunk) for chunk in chunks[:2]]
+        for i in range(len(chunks)):
+            items = list(pending[i])
+            if i + 2 < len(chunks):
+                pending.append(pool.map(dataset.__getitem__, chunks[i + 2]))
+            yield _collate(items)
+
+
+def predict_batched(paths, backend, transform, batch_size=16, workers=4, cache=None, model_key=None):
+    """
+    Génère (chemin, TopK) au fil des lots (TopK None si l'image est illisible) : seules les classes
+    les plus probables sont gardées, comme dans le cache des prédictions.
+    Les images déjà présentes dans le cache ne sont ni décodées ni passées au réseau.
+    """
+    hashes = {}
+    todo = []
+    for path in paths:
+        if cache is not None and model_key:
+            try:
+                hashes[path] = content_hash(path)
+            except OSError:
+                yield path, None
+                continue
+            top = cache.get_top_k(hashes[path], model_key)
+            if top is not None:
+                yield path, top
+                continue
+        todo.append(path)
+
+    for indices, batch, failed in _batches(todo, transform, batch_size, workers, backend.name == "torch"):
+        for i in failed:
+            yield todo[i], None
+        if batch is None:
+            continue
+        probs = backend.infer_batch(batch)
+        for i, p in zip(indices, probs):
+            path = todo[i]
+            top = TopK.from_probs(p)
+            if path in hashes:
+                cache.put(hashes[path], model_key, top)
+            yield path, top
+
+
+def _rename_with_prefix(service, path, specie):
+    meta = read_metadata(path)
+    target = service.build_final_path(path, service.parse_name(with_name_prefix(meta.name, specie)))
+    if target != path:
+        if os.path.exists(target):
+            raise FileExistsError(f"Le fichier {os.path.basename(target)} existe déjà")
+        os.rename(path, target)
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m detect_specie.batch", description="Reconnaissance d'espèce par lots.")
+    parser.add_argument("paths", nargs="+", help="Dossiers, fichiers ou motifs glob")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Parcourt les sous-dossiers")
+    parser.add_argument("-b", "--batch-size", type=int, default=16)
+    parser.add_argument("-j", "--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Processus (PyTorch) ou threads (ONNX Runtime) de décodage des images")
+    parser.add_argument("--no-location", action="store_true", help="Ignore les coordonnées GPS des photos")
+    parser.add_argument("--prefix", action="store_true", help="Préfixe le nom des fichiers par l'espèce détectée")
+    parser.add_argument("--torch", action="store_true", help="Utilise PyTorch même si le modèle ONNX exporté existe")
+    parser.add_argument("--precision", choices=PRECISIONS, default=DEFAULT_PRECISION, help="Précision du modèle")
+    parser.add_argument("-o", "--output", help="Fichier CSV des résultats (sortie standard par défaut)")
+    args = parser.parse_args(argv)
+
+    paths = collect_paths(args.paths, recursive=args.recursive)
+    if not paths:
+        print("Aucune image trouvée.")
+        return 1
+
+    # Même serveur d'inférence que l'éditeur : le modèle et le décodage des images vivent dans son processus
+    with InferenceServer(prefer_onnx=not args.torch, precision=args.precision) as server:
+        server.wait_ready()
+        top_by_path = server.predict_batch(paths, args.batch_size, args.workers).result()
+        class_mapping = server.class_mapping
+
+    range_index = SpeciesRangeIndex.load()
+    location_check = range_index.is_observed if range_index is not None else None
+
+    service = ExifEditorService(StyleData())
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    errors = 0
+    try:
+        writer = csv.writer(out)
+        writer.writerow(["path", "specie", "score", "final_path", "error"])
+        for path in paths:
+            top = top_by_path.get(path)
+            if top is None:
+                writer.writerow([path, "", "", path, "Image illisible"])
+                errors += 1
+                continue
+            probs = top.dense()
+
+            lat, lon = (None, None)
+            if not args.no_location:
+                lat, lon = read_metadata(path).coordinates
+            specie, score = rank_specie(
+                probs, lat, lon, class_mapping, location_check=location_check, range_index=range_index
+            )
+
+            final_path, error = path, ""
+            if specie and args.prefix:
+                try:
+                    final_path = _rename_with_prefix(service, path, specie)
+                except Exception as e:
+                    error = str(e)
+                    errors += 1
+            writer.writerow([path, specie, f"{score:.4f}" if specie else "", final_path, error])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
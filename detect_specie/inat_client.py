@@ -0,0 +1,264 @@
+"""
+Client iNaturalist partagé : session HTTP avec pool de connexions, vérifications en parallèle,
+cache disque (TTL + LRU) des identifiants de taxons et des présences, et limitation du débit.
+
+L'URL de l'API est configurable (base_url), ce qui permet de tester contre un serveur local.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+INAT_API_URL = "https://api.inaturalist.org/v1"
+INAT_TAXON_URL = "https://www.inaturalist.org/taxa/{}"
+CACHE_PATH = Path.home() / ".exiftools" / "inat.sqlite"
+
+# iNaturalist demande de rester autour d'une requête par seconde ; une détection a au plus cinq
+# candidats au-dessus du seuil de 0,2, vérifiés d'un coup
+DEFAULT_RATE_PER_S = 1.0
+DEFAULT_BURST = 5
+DEFAULT_TTL_S = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_WORKERS = 4
+
+# Arrondi des coordonnées dans les clés du cache (~1 km) : négligeable devant le rayon de recherche
+_COORD_DECIMALS = 2
+# Dates de dernière utilisation écrites par lots : une lecture du cache ne coûte pas une transaction
+_TOUCH_BATCH = 64
+
+
+class RateLimiter:
+    """
+    Seau à jetons partagé par tous les threads : rate_per_s requêtes par seconde en moyenne, avec
+    jusqu'à burst requêtes immédiates. Les candidats d'une détection partent donc ensemble.
+    """
+
+    def __init__(self, rate_per_s, burst=1):
+        self.rate = rate_per_s
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+
+    def wait(self):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Jeton réservé même s'il faut l'attendre : les suivants attendent d'autant plus
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+
+
+class DiskCache:
+    """
+    Cache clé -> valeur JSON persistant dans SQLite, avec expiration (ttl_s) et éviction des entrées
+    les moins récemment utilisées au-delà de max_entries. Les lectures passent par un LRU mémoire ;
+    elles comptent aussi pour l'éviction sur disque (last_used, écrit par lots avant chaque éviction).
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl_s=DEFAULT_TTL_S, max_entries=DEFAULT_MAX_ENTRIES, memory_entries=2048):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+            self._conn.commit()
+
+    def get(self, key):
+        """Renvoie (trouvé, valeur)."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires >= now:
+                    self._memory.move_to_end(key)
+                    self._touch(key, now)
+                    return True, value
+                del self._memory[key]
+
+            if self._conn is None:
+                return False, None
+            row = self._conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                return False, None
+            self._touch(key, now)
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            return True, value
+
+    def put(self, key, value):
+        now = time.time()
+        expires = now + self.ttl_s
+        with self._lock:
+            self._remember(key, value, expires)
+            if self._conn is None:
+                return
+            with self._conn:
+                self._flush_touched()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires, last_used) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires, now),
+                )
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def _touch(self, key, now):
+        if self._conn is None:
+            return
+        self._touched[key] = now
+        if len(self._touched) >= _TOUCH_BATCH:
+            with self._conn:
+                self._flush_touched()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE cache SET last_used = ? WHERE key = ?", [(used, key) for key, used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _remember(self, key, value, expires):
+        self._memory[key] = (value, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+class INatClient:
+    def __init__(
+        self,
+        base_url=INAT_API_URL,
+        cache_path=CACHE_PATH,
+        ttl_s=DEFAULT_TTL_S,
+        rate_per_s=DEFAULT_RATE_PER_S,
+        burst=DEFAULT_BURST,
+        workers=DEFAULT_WORKERS,
+        timeout=5,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cache = DiskCache(cache_path, ttl_s)
+        self.rate_limiter = RateLimiter(rate_per_s, burst)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inat")
+
+    def _get_json(self, endpoint, params):
+        self.rate_limiter.wait()
+        resp = self.session.get(f"{self.base_url}/{endpoint}", params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _cached(self, key, fetch):
+        """Valeur du cache, sinon fetch() mise en cache. Les erreurs réseau ne sont pas mises en cache."""
+        found, value = self.cache.get(key)
+        if found:
+            return value
+        value = fetch()
+        self.cache.put(key, value)
+        return value
+
+    # ---------- Taxons ----------
+
+    def taxon_id(self, scientific_name):
+        """Identifiant iNaturalist de l'espèce, ou None (inconnue ou erreur réseau)."""
+        if not scientific_name:
+            return None
+
+        def fetch():
+            results = self._get_json("taxa", {"q": scientific_name, "rank": "species"}).get("results", [])
+            return str(results[0].get("id")) if results else None
+
+        try:
+            return self._cached(f"taxon:{scientific_name.lower()}", fetch)
+        except Exception:
+            return None
+
+    def taxon_url(self, scientific_name):
+        taxon_id = self.taxon_id(scientific_name)
+        return INAT_TAXON_URL.format(taxon_id) if taxon_id else None
+
+    # ---------- Présence ----------
+
+    def is_observed(self, scientific_name, lat, lon, radius_km=500):
+        """Vrai si l'espèce a été observée à moins de radius_km ; faux aussi en cas d'erreur réseau."""
+        if not scientific_name or lat is None or lon is None:
+            return False
+        lat, lon = round(lat, _COORD_DECIMALS), round(lon, _COORD_DECIMALS)
+
+        def fetch():
+            data = self._get_json(
+                "observations",
+                {"taxon_name": scientific_name, "lat": lat, "lng": lon, "radius": radius_km, "per_page": 1},
+            )
+            return data.get("total_results", 0) > 0
+
+        try:
+            return self._cached(f"obs:{scientific_name.lower()}:{lat}:{lon}:{radius_km}", fetch)
+        except Exception:
+            return False
+
+    def first_observed(self, scientific_names, lat, lon, radius_km=500):
+        """
+        Premier nom de la liste observé près de (lat, lon), ou None. Les vérifications partent en
+        parallèle, mais la réponse est rendue dès que le meilleur candidat observé est connu ; les
+        requêtes pas encore parties pour les candidats suivants sont annulées.
+        """
+        names = list(dict.fromkeys(scientific_names))
+        futures = [self._executor.submit(self.is_observed, name, lat, lon, radius_km) for name in names]
+        try:
+            for name, future in zip(names, futures):
+                if future.result():
+                    return name
+            return None
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """Client partagé par l'application (créé au premier appel)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = INatClient()
+        return _default_client
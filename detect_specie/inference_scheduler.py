@@ -0,0 +1,101 @@
+import os
+import threading
+from dataclasses import dataclass
+
+from detect_specie.inference_worker import InferenceWorker
+
+
+@dataclass(frozen=True)
+class InferenceRequest:
+    image_path: str
+    mtime_ns: int
+    lat: float | None
+    lon: float | None
+
+    @property
+    def key(self):
+        return self.image_path, self.mtime_ns, self.lat, self.lon
+
+
+class InferenceScheduler:
+    """
+    Point d'entrée unique des détections d'espèce.
+    - debounce : une rafale de demandes (édition lat, lon, date...) ne lance qu'une inférence ;
+    - fusion : une demande identique (chemin, mtime, coordonnées) à celle en cours est ignorée ;
+    - obsolescence : seule la dernière demande est gardée, et elle est abandonnée si l'image change ;
+    - concurrence bornée : au plus max_concurrent inférences à la fois.
+    """
+
+    def __init__(self, model_service, queue, debounce_s=0.4, max_concurrent=1):
+        self.model_service = model_service
+        self.queue = queue
+        self.debounce_s = debounce_s
+        self.max_concurrent = max_concurrent
+
+        self._lock = threading.Lock()
+        self._timer = None
+        self._pending = None
+        self._running = 0
+        self._in_flight = set()
+
+    def request(self, image_path, lat, lon):
+        try:
+            mtime_ns = os.stat(image_path).st_mtime_ns
+        except OSError:
+            return
+
+        with self._lock:
+            self._pending = InferenceRequest(image_path, mtime_ns, lat, lon)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_s, self._dispatch)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def drop_stale(self, current_path):
+        """Abandonne la demande en attente si elle ne concerne plus l'image affichée."""
+        with self._lock:
+            if self._pending is not None and self._pending.image_path != current_path:
+                self._pending = None
+
+    def cancel(self):
+        with self._lock:
+            self._pending = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _dispatch(self):
+        with self._lock:
+            self._timer = None
+            request = self._pending
+            if request is None:
+                return
+            if request.key in self._in_flight:
+                self._pending = None
+                return
+            if self._running >= self.max_concurrent:
+                # Relancé à la fin d'une inférence en cours
+                return
+
+            self._pending = None
+            self._running += 1
+            self._in_flight.add(request.key)
+
+            worker = InferenceWorker(
+                self.model_service,
+                request.image_path,
+                request.lat,
+                request.lon,
+                self.queue,
+                on_done=lambda: self._on_done(request),
+            )
+        worker.start()
+
+    def _on_done(self, request):
+        with self._lock:
+            self._running -= 1
+            self._in_flight.discard(request.key)
+            resume = self._pending is not None and self._timer is None
+        if resume:
+            self._dispatch()
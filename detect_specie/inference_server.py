@@ -0,0 +1,267 @@
+"""
+Serveur d'inférence dans un processus dédié.
+
+Le modèle est chargé une fois dans le processus enfant et y reste entre les requêtes ; décodage,
+prétraitement et passage dans le réseau n'y disputent plus le GIL à l'interface Qt. Le parent
+échange avec lui des messages (identifiant, opération, arguments) sur un Pipe : seuls des chemins
+d'images partent vers l'enfant, les images sont décodées sur place.
+
+Côté parent, les réponses arrivent dans un Future ; les événements de cycle de vie sont aussi postés
+dans la queue de l'application (model_ready, model_error).
+"""
+import atexit
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future
+
+from detect_specie.quantize import DEFAULT_PRECISION
+
+# Résultats d'un lot renvoyés au parent par paquets : aucun message ne porte tout le lot
+RESULT_CHUNK_SIZE = 256
+
+
+def _serve(conn, prefer_onnx, precision):
+    """Boucle du processus enfant."""
+    from detect_specie.inat_client import default_client
+    from detect_specie.main import find_specie
+    from detect_specie.model_loader import export_backend, inference_helpers, load_backend, model_key
+    from detect_specie.prediction_cache import PredictionCache
+    from detect_specie.range_index import SpeciesRangeIndex
+
+    try:
+        backend, model_info = load_backend(prefer_onnx, precision)
+        class_mapping, transform = inference_helpers(model_info, backend)
+        key = model_key(precision)
+    except Exception as e:
+        conn.send(("model_error", None, str(e)))
+        return
+
+    cache = range_index = None
+    try:
+        cache = PredictionCache()
+    except Exception as e:
+        print(f"[InferenceServer] Cache des prédictions indisponible : {e}")
+    try:
+        range_index = SpeciesRangeIndex.load()
+    except Exception as e:
+        print(f"[InferenceServer] Index de présence des espèces illisible : {e}")
+
+    conn.send(("model_ready", None, {"model_key": key, "precision": precision, "class_mapping": class_mapping}))
+
+    # Le modèle répond déjà : l'export ONNX pour les prochains lancements se fait à côté
+    def export():
+        try:
+            export_backend(backend, model_info, precision)
+        except Exception as e:
+            print(f"[InferenceServer] Export ONNX impossible : {e}")
+
+    threading.Thread(target=export, daemon=True).start()
+
+    while True:
+        try:
+            request_id, op, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        if op == "shutdown":
+            return
+        try:
+            if op == "find":
+                path, lat, lon = args
+                specie = find_specie(
+                    path,
+                    lat,
+                    lon,
+                    backend,
+                    class_mapping,
+                    transform,
+                    cache=cache,
+                    model_key=key,
+                    location_check=range_index.is_observed if range_index is not None else None,
+                    range_index=range_index,
+                )
+                url = default_client().taxon_url(specie) if specie else None
+                result = (specie, path, url)
+            elif op == "predict_batch":
+                from detect_specie.batch import predict_batched
+
+                paths, batch_size, workers = args
+                chunk = []
+                for item in predict_batched(paths, backend, transform, batch_size, workers, cache, key):
+                    chunk.append(item)
+                    if len(chunk) >= RESULT_CHUNK_SIZE:
+                        conn.send(("partial", request_id, chunk))
+                        chunk = []
+                if chunk:
+                    conn.send(("partial", request_id, chunk))
+                result = len(paths)
+            else:
+                raise ValueError(f"Opération inconnue : {op}")
+            conn.send(("result", request_id, result))
+        except Exception as e:
+            conn.send(("error", request_id, str(e)))
+
+
+class InferenceServer:
+    def __init__(self, queue=None, model_service=None, prefer_onnx=True, precision=DEFAULT_PRECISION):
+        self.queue = queue
+        self.model_service = model_service
+        self.prefer_onnx = prefer_onnx
+        self.precision = precision
+
+        self.model_key = None
+        self.class_mapping = None
+        self.error = None
+
+        self._ready = threading.Event()
+        self._closing = False
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending = {}
+        self._conn = None
+        self._process = None
+
+    # ---------- Cycle de vie ----------
+
+    def start(self):
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_serve, args=(child_conn, self.prefer_onnx, self.precision), name="inference-server"
+        )
+        self._process.start()
+        child_conn.close()
+        # Processus non démon (il peut lancer les workers du DataLoader) : on l'arrête avant que
+        # multiprocessing ne l'attende à la sortie de l'interpréteur
+        atexit.register(self.close)
+        threading.Thread(target=self._listen, daemon=True).start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """Attend le chargement du modèle ; lève RuntimeError s'il a échoué."""
+        self._ready.wait(timeout)
+        if self.error:
+            raise RuntimeError(self.error)
+        return self._ready.is_set()
+
+    def close(self, timeout=5):
+        if self._process is None:
+            return
+        # Arrêt voulu : plus aucun événement ne doit remonter vers l'application
+        self._closing = True
+        try:
+            with self._lock:
+                self._conn.send((None, "shutdown", None))
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._conn.close()
+        self._process = None
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Requêtes ----------
+
+    def _call(self, op, args, on_partial=None):
+        future = Future()
+        with self._lock:
+            if self._process is None:
+                raise RuntimeError("Serveur d'inférence arrêté")
+            request_id = next(self._ids)
+            self._pending[request_id] = (future, on_partial)
+            self._conn.send((request_id, op, args))
+        return future
+
+    def find(self, image_path, lat, lon):
+        """Future de (espèce, chemin, lien iNaturalist)."""
+        return self._call("find", (image_path, lat, lon))
+
+    def predict_batch(self, paths, batch_size=16, workers=0, on_chunk=None):
+        """
+        Future de {chemin: TopK ou None}. Les résultats arrivent par paquets de RESULT_CHUNK_SIZE ;
+        avec on_chunk, chaque paquet (liste de (chemin, TopK ou None)) lui est passé au fil de l'eau
+        depuis le thread d'écoute et le Future ne renvoie que le nombre d'images.
+        """
+        args = (list(paths), batch_size, workers)
+        if on_chunk is not None:
+            return self._call("predict_batch", args, on_chunk)
+
+        results = {}
+        done = Future()
+
+        def finish(future):
+            if future.exception() is not None:
+                done.set_exception(future.exception())
+            else:
+                done.set_result(results)
+
+        self._call("predict_batch", args, results.update).add_done_callback(finish)
+        return done
+
+    # ---------- Réponses ----------
+
+    def _post(self, event, payload):
+        if self.queue is not None:
+            self.queue.put((event, payload))
+
+    def _listen(self):
+        while True:
+            try:
+                kind, request_id, payload = self._conn.recv()
+            except (EOFError, OSError):
+                break
+
+            if kind == "model_ready":
+                if self._closing:
+                    continue
+                self.model_key = payload["model_key"]
+                self.class_mapping = payload["class_mapping"]
+                if self.model_service is not None:
+                    self.model_service.model_key = self.model_key
+                    self.model_service.precision = payload["precision"]
+                    self.model_service.ready = True
+                    self.model_service.loading = False
+                self._ready.set()
+                self._post("model_ready", None)
+            elif kind == "model_error":
+                self._fail(payload)
+                break
+            elif kind == "partial":
+                with self._lock:
+                    entry = self._pending.get(request_id)
+                if entry is not None and entry[1] is not None:
+                    entry[1](payload)
+            else:
+                with self._lock:
+                    entry = self._pending.pop(request_id, None)
+                if entry is None:
+                    continue
+                future = entry[0]
+                if kind == "result":
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RuntimeError(payload))
+
+        if not self._ready.is_set() and not self._closing:
+            self._fail("Le serveur d'inférence s'est arrêté pendant le chargement du modèle")
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            future.set_exception(RuntimeError("Serveur d'inférence arrêté"))
+
+    def _fail(self, error):
+        self.error = error
+        self._ready.set()
+        if self._closing:
+            return
+        if self.model_service is not None:
+            self.model_service.set_error(error)
+        self._post("model_error", error)
@@ -2,30 +2,24 @@ import threading
 
 
 class InferenceWorker(threading.Thread):
-    def __init__(self, model_service, image_path, lat, lon, queue, class_mapping, transform):
+    def __init__(self, model_service, image_path, lat, lon, queue, on_done=None):
         super().__init__(daemon=True)
         self.model_service = model_service
         self.image_path = image_path
         self.lat = lat
         self.lon = lon
         self.queue = queue
-        self.class_mapping = class_mapping
-        self.transform = transform
+        self.on_done = on_done
 
     def run(self):
         try:
-            from detect_specie.main import find_specie
-
-            specie = find_specie(
-                self.image_path,
-                self.lat,
-                self.lon,
-                self.model_service.net,
-                self.class_mapping,
-                self.transform
-            )
-
-            self.queue.put(("inference_done", (specie, self.image_path)))
+            # Le thread ne fait qu'attendre la réponse du processus d'inférence
+            result = self.model_service.server.find(self.image_path, self.lat, self.lon).result()
+            self.queue.put(("inference_done", result))
 
         except Exception as e:
             self.queue.put(("inference_error", str(e)))
+
+        finally:
+            if self.on_done is not None:
+                self.on_done()
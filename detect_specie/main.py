@@ -1,5 +1,7 @@
-from birder.inference.classification import infer_image
-import requests
+import numpy as np
+
+from detect_specie.inat_client import default_client
+from detect_specie.prediction_cache import content_hash
 
 
 def get_latin_name(class_id, class_mapping):
@@ -11,49 +13,100 @@ def is_species_at_location(scientific_name, lat, lon, radius_km=500):
     """
     Vérifie si l'espèce est observée près de la localisation donnée via l'API iNaturalist.
     """
-    if not scientific_name or lat is None or lon is None:
-        return False
+    return default_client().is_observed(scientific_name, lat, lon, radius_km)
+
 
-    url = "https://api.inaturalist.org/v1/observations"
-    params = {
-        "taxon_name": scientific_name,
-        "lat": lat,
-        "lng": lon,
-        "radius": radius_km,
-        "per_page": 1
-    }
+def predict(image_path, backend, transform, cache=None, model_key=None):
+    """
+    Probabilités du modèle pour l'image. Si un cache est fourni, une image déjà classée
+    (même contenu, même modèle) ne repasse pas dans le réseau.
+    """
+    key = None
+    if cache is not None and model_key:
+        key = content_hash(image_path)
+        probs = cache.get(key, model_key)
+        if probs is not None:
+            return probs
 
-    try:
-        resp = requests.get(url, params=params, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
-        return data.get("total_results", 0) > 0
-    except Exception:
-        return False
+    probs = backend.infer(image_path, transform)
+    if key is not None:
+        cache.put(key, model_key, probs)
+    return probs
 
 
-def find_specie(image_path, lat, lon, net, class_mapping, transform):
+def rerank(probs, prior, top_k=5):
     """
-    Infère l'espèce de l'image et utilise la localisation pour valider la prédiction.
-    Retourne le nom scientifique si trouvé, sinon "".
+    Combine d'un coup les probabilités du modèle et l'a priori de localisation sur toutes les classes,
+    renormalise, et renvoie les top_k (indice de classe, score) par score décroissant.
     """
-    # inférence du modèle
-    threshold = 0.2
-    out, _ = infer_image(net, image_path, transform)
-    probs = out[0]
+    posterior = np.asarray(probs, dtype=np.float64) * prior
+    total = posterior.sum()
+    if total <= 0:
+        return []
+    posterior /= total
+    k = min(top_k, posterior.size)
+    top = np.argpartition(posterior, -k)[-k:]
+    top = top[np.argsort(posterior[top])[::-1]]
+    return [(int(i), float(posterior[i])) for i in top]
 
-    sorted_indices = probs.argsort()[::-1]
 
+def rank_candidates(probs, lat, lon, class_mapping, range_index, radius_km=500, top_k=5):
+    """Top-k (nom scientifique, score) après re-classement par l'index de présence hors ligne."""
+    ids = range_index.aligned_taxon_ids(class_mapping, len(probs), get_latin_name)
+    prior = range_index.prior(ids, lat, lon, radius_km)
+    return [(get_latin_name(i, class_mapping), score) for i, score in rerank(probs, prior, top_k)]
+
+
+def rank_specie(probs, lat, lon, class_mapping, threshold=0.2, location_check=None, range_index=None):
+    """
+    Parcourt les classes par probabilité décroissante et renvoie (nom, score) de la première au-dessus
+    du seuil observée près de la localisation (ou la première tout court sans localisation), sinon ("", 0.0).
+    location_check(nom, lat, lon) remplace la vérification en ligne (ex. SpeciesRangeIndex.is_observed).
+    Avec range_index, toutes les classes sont pondérées par l'a priori de localisation en une opération
+    vectorielle. Le seuil porte sur le produit non renormalisé : une classe non observée près de la
+    localisation (poids absent_weight) ne peut pas l'atteindre, comme avec location_check.
+    """
+    if range_index is not None and lat is not None and lon is not None:
+        ids = range_index.aligned_taxon_ids(class_mapping, len(probs), get_latin_name)
+        posterior = np.asarray(probs, dtype=np.float64) * range_index.prior(ids, lat, lon)
+        best = int(np.argmax(posterior))
+        if posterior[best] >= threshold:
+            return get_latin_name(best, class_mapping), float(posterior[best])
+        return "", 0.0
+
+    sorted_indices = probs.argsort()[::-1]
+    candidates = []
     for class_id in sorted_indices:
         score = probs[class_id]
         if score < threshold:
-            continue
+            break
+        candidates.append((get_latin_name(class_id, class_mapping), float(score)))
+
+    if not candidates:
+        return "", 0.0
+    if lat is None or lon is None:
+        return candidates[0]
 
-        scientific_name = get_latin_name(class_id, class_mapping)
-        if lat is None or lon is None:
-            return scientific_name
-        if is_species_at_location(scientific_name, lat, lon):
-            return scientific_name
+    if location_check is None:
+        # Candidats vérifiés en parallèle auprès d'iNaturalist, réponse dès que le meilleur observé est connu
+        best = default_client().first_observed([name for name, _ in candidates], lat, lon)
+        return next(((name, score) for name, score in candidates if name == best), ("", 0.0))
+
+    for scientific_name, score in candidates:
+        if location_check(scientific_name, lat, lon):
+            return scientific_name, score
 
     # aucun match avec la localisation
-    return ""
+    return "", 0.0
+
+
+def find_specie(image_path, lat, lon, backend, class_mapping, transform, cache=None, model_key=None, location_check=None,
+                range_index=None):
+    """
+    Infère l'espèce de l'image et utilise la localisation pour valider la prédiction.
+    Retourne le nom scientifique si trouvé, sinon "".
+    """
+    # inférence du modèle
+    probs = predict(image_path, backend, transform, cache, model_key)
+    specie, _ = rank_specie(probs, lat, lon, class_mapping, location_check=location_check, range_index=range_index)
+    return specie
@@ -1,34 +1,93 @@
-import threading
+from importlib import metadata
 from pathlib import Path
 
-MODEL_PATH = Path.home() / ".exiftools" / "models" / "vit_reg4_m16_rms_avg_i-jepa-inat21.pt"
+from detect_specie.backends import OnnxBackend, TorchBackend, export_onnx, load_exported_info, onnx_available
+from detect_specie.quantize import DEFAULT_PRECISION, quantize_onnx, quantize_torch
 
+MODEL_NAME = "vit_reg4_m16_rms_avg_i-jepa-inat21"
+MODEL_PATH = Path.home() / ".exiftools" / "models" / f"{MODEL_NAME}.pt"
+# Modèle exporté au premier lancement, relu directement par ONNX Runtime ensuite
+ONNX_PATH = MODEL_PATH.with_suffix(".onnx")
+ONNX_INFO_PATH = MODEL_PATH.with_suffix(".json")
+INT8_ONNX_PATH = MODEL_PATH.with_suffix(".int8.onnx")
 
-class ModelLoaderThread(threading.Thread):
-    def __init__(self, model_service, queue):
-        super().__init__(daemon=True)
-        self.model_service = model_service
-        self.queue = queue
 
-    def run(self):
-        try:
-            self.model_service.loading = True
+def model_key(precision=DEFAULT_PRECISION):
+    """Identifie le modèle pour le cache des prédictions : nom, version de birder, fichier de poids, précision."""
+    try:
+        birder_version = metadata.version("birder")
+    except metadata.PackageNotFoundError:
+        birder_version = "?"
+    try:
+        weights = MODEL_PATH.stat().st_size
+    except OSError:
+        weights = 0
+    key = f"{MODEL_NAME}@{birder_version}:{weights}"
+    return key if precision == DEFAULT_PRECISION else f"{key}:{precision}"
 
-            import birder
 
-            net, model_info = birder.load_pretrained_model(
-                "vit_reg4_m16_rms_avg_i-jepa-inat21",
-                inference=True,
-                dst=MODEL_PATH
-            )
+def load_model():
+    import birder
 
-            self.model_service.net = net
-            self.model_service.model_info = model_info
-            self.model_service.ready = True
-            self.model_service.loading = False
+    return birder.load_pretrained_model(
+        MODEL_NAME,
+        inference=True,
+        dst=MODEL_PATH
+    )
 
-            self.queue.put(("model_ready", None))
 
-        except Exception as e:
-            self.model_service.set_error(str(e))
-            self.queue.put(("model_error", str(e)))
+def _onnx_artifact(precision):
+    """
+    (chemin ONNX, model_info) de la précision demandée si l'export fp32 correspond encore aux poids,
+    sinon (None, None). Le modèle INT8 est dérivé de l'export fp32 s'il manque ou est plus ancien.
+    """
+    if not (onnx_available() and ONNX_PATH.exists()):
+        return None, None
+    model_info = load_exported_info(ONNX_INFO_PATH, model_key())
+    if model_info is None:
+        return None, None
+    if precision != "int8":
+        return ONNX_PATH, model_info
+    if not INT8_ONNX_PATH.exists() or INT8_ONNX_PATH.stat().st_mtime_ns < ONNX_PATH.stat().st_mtime_ns:
+        quantize_onnx(ONNX_PATH, INT8_ONNX_PATH)
+    return INT8_ONNX_PATH, model_info
+
+
+def load_backend(prefer_onnx=True, precision=DEFAULT_PRECISION, export=False):
+    """
+    Renvoie (backend, model_info). Le modèle exporté est utilisé s'il correspond encore aux poids,
+    sinon le réseau birder est chargé en PyTorch (et exporté d'abord si export=True).
+    """
+    if prefer_onnx:
+        path, model_info = _onnx_artifact(precision)
+        if path is not None:
+            return OnnxBackend(path), model_info
+
+    net, model_info = load_model()
+    backend = TorchBackend(net)
+    if export and prefer_onnx and export_backend(backend, model_info):
+        path, model_info = _onnx_artifact(precision)
+        return OnnxBackend(path), model_info
+    if precision == "int8":
+        backend = TorchBackend(quantize_torch(net), export_net=net)
+    return backend, model_info
+
+
+def export_backend(backend, model_info, precision=DEFAULT_PRECISION):
+    """
+    Exporte en ONNX le réseau fp32 chargé en PyTorch (et sa version INT8 si c'est la précision choisie),
+    pour les lancements suivants. Renvoie True si l'export a eu lieu.
+    """
+    if backend.name != "torch" or not onnx_available():
+        return False
+    export_onnx(backend.export_net, model_info, ONNX_PATH, ONNX_INFO_PATH, model_key())
+    if precision == "int8":
+        quantize_onnx(ONNX_PATH, INT8_ONNX_PATH)
+    return True
+
+
+def inference_helpers(model_info, backend=None):
+    """Table indice -> nom de classe et transformation d'entrée du modèle (adaptée au backend)."""
+    class_mapping = {v: k for k, v in model_info.class_to_idx.items()}
+    transform = (backend or TorchBackend(None)).transform(model_info)
+    return class_mapping, transform
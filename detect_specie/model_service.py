@@ -1,13 +1,14 @@
 class ModelService:
     def __init__(self):
-        self.net = None
-        self.model_info = None
+        self.server = None  # InferenceServer : le modèle tourne dans un processus dédié
         self.ready = False
         self.loading = False
         self.error = None
+        self.model_key = None
+        self.precision = None
 
     def is_ready(self):
-        return self.ready and self.net is not None
+        return self.ready and self.server is not None
 
     def set_error(self, error):
         self.error = error
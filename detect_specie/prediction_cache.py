@@ -0,0 +1,115 @@
+import hashlib
+import sqlite3
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+CACHE_PATH = Path.home() / ".exiftools" / "predictions.sqlite"
+
+# Nombre de classes conservées par image : largement au-delà de ce qu'utilise le re-classement par localisation
+TOP_K = 100
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _jpeg_pixel_data_offset(f):
+    """Position du premier segment après les APPn/COM (EXIF, XMP...) d'un JPEG, 0 sinon."""
+    if f.read(2) != b"\xff\xd8":
+        return 0
+    pos = 2
+    while True:
+        head = f.read(4)
+        if len(head) < 4 or head[0] != 0xFF:
+            return pos
+        marker = head[1]
+        if not (0xE0 <= marker <= 0xEF or marker == 0xFE):
+            return pos
+        length = struct.unpack(">H", head[2:4])[0]
+        pos += 2 + length
+        f.seek(pos)
+
+
+def content_hash(image_path):
+    """
+    Empreinte du contenu de l'image. Pour un JPEG, les segments de métadonnées sont ignorés :
+    modifier la date ou les coordonnées ne change pas l'empreinte.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(image_path, "rb") as f:
+        f.seek(_jpeg_pixel_data_offset(f))
+        while chunk := f.read(_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class TopK:
+    """Probabilités des TOP_K classes les plus probables : forme compacte stockée et échangée entre processus."""
+    num_classes: int
+    indices: np.ndarray  # int32
+    probs: np.ndarray  # float32
+
+    @classmethod
+    def from_probs(cls, probs, k=TOP_K):
+        probs = np.asarray(probs, dtype=np.float32)
+        k = min(k, probs.size)
+        indices = np.argpartition(probs, -k)[-k:].astype(np.int32)
+        return cls(int(probs.size), indices, probs[indices])
+
+    def dense(self):
+        """Vecteur de probabilités complet, classes hors top-k à 0."""
+        out = np.zeros(self.num_classes, dtype=np.float32)
+        out[self.indices] = self.probs
+        return out
+
+
+class PredictionCache:
+    """Probabilités top-k du modèle par (empreinte de l'image, modèle), persistées dans SQLite."""
+
+    def __init__(self, path=CACHE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS predictions (
+                content_hash TEXT NOT NULL,
+                model_key TEXT NOT NULL,
+                num_classes INTEGER NOT NULL,
+                indices BLOB NOT NULL,
+                probs BLOB NOT NULL,
+                PRIMARY KEY (content_hash, model_key)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, content_hash, model_key):
+        """Renvoie le vecteur de probabilités (classes hors top-k à 0) ou None."""
+        top = self.get_top_k(content_hash, model_key)
+        return top.dense() if top is not None else None
+
+    def get_top_k(self, content_hash, model_key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT num_classes, indices, probs FROM predictions WHERE content_hash = ? AND model_key = ?",
+                (content_hash, model_key),
+            ).fetchone()
+        if row is None:
+            return None
+        num_classes, indices, probs = row
+        return TopK(num_classes, np.frombuffer(indices, dtype=np.int32), np.frombuffer(probs, dtype=np.float32))
+
+    def put(self, content_hash, model_key, probs):
+        """probs : vecteur complet ou TopK."""
+        top = probs if isinstance(probs, TopK) else TopK.from_probs(probs)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO predictions (content_hash, model_key, num_classes, indices, probs) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (content_hash, model_key, top.num_classes, top.indices.tobytes(), top.probs.tobytes()),
+            )
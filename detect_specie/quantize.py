@@ -0,0 +1,119 @@
+"""
+Mode INT8 du modèle d'espèces : quantification dynamique des couches linéaires, et rapport
+précision / latence face au modèle fp32 sur un jeu de validation local.
+
+    python -m detect_specie.quantize VALIDATION [--limit 200]
+
+VALIDATION est un dossier avec un sous-dossier par espèce, nommé par son nom scientifique
+(ex. "Parus major/photo1.jpg"), ou un CSV path,scientific_name.
+"""
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+
+
+PRECISIONS = ("fp32", "int8")
+DEFAULT_PRECISION = "fp32"
+
+
+def quantize_onnx(src_path, dst_path):
+    """Quantifie en INT8 (poids, activations dynamiques) les MatMul/Gemm du modèle ONNX fp32."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp_path = f"{dst_path}.tmp"
+    try:
+        quantize_dynamic(str(src_path), tmp_path, op_types_to_quantize=["MatMul", "Gemm"], weight_type=QuantType.QInt8)
+        os.replace(tmp_path, dst_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def quantize_torch(net):
+    """Variante PyTorch (sans ONNX Runtime) : nn.Linear en INT8 dynamique, en mémoire."""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(net, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+# ---------- Rapport précision / latence ----------
+
+def _load_validation_set(source):
+    """Liste de (chemin, nom scientifique)."""
+    from editor.cli import collect_paths
+
+    if os.path.isdir(source):
+        samples = []
+        for entry in sorted(os.scandir(source), key=lambda e: e.name):
+            if entry.is_dir():
+                samples.extend((path, entry.name) for path in collect_paths([entry.path]))
+        return samples
+    with open(source, newline="", encoding="utf-8-sig") as f:
+        return [(row[0], row[1]) for row in csv.reader(f) if len(row) >= 2 and os.path.isfile(row[0])]
+
+
+def _evaluate(backend, transform, class_mapping, samples):
+    from detect_specie.main import get_latin_name
+
+    latencies, predictions = [], []
+    top1 = top5 = 0
+    for path, label in samples:
+        start = time.perf_counter()
+        probs = backend.infer(path, transform)
+        latencies.append(time.perf_counter() - start)
+
+        top = probs.argsort()[::-1][:5]
+        names = [get_latin_name(i, class_mapping).lower() for i in top]
+        predictions.append(names[0])
+        top1 += names[0] == label.lower()
+        top5 += label.lower() in names
+    n = max(len(samples), 1)
+    return {
+        "top1": top1 / n,
+        "top5": top5 / n,
+        "latency_ms": 1000 * statistics.median(latencies) if latencies else 0.0,
+        "predictions": predictions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m detect_specie.quantize",
+                                     description="Compare les modèles fp32 et int8 (précision et latence).")
+    parser.add_argument("validation", help="Dossier (un sous-dossier par espèce) ou CSV path,scientific_name")
+    parser.add_argument("--limit", type=int, default=None, help="Nombre maximal d'images évaluées")
+    args = parser.parse_args(argv)
+
+    samples = _load_validation_set(args.validation)[:args.limit]
+    if not samples:
+        print("Jeu de validation vide.")
+        return 1
+
+    from detect_specie.model_loader import inference_helpers, load_backend
+
+    results = {}
+    for precision in PRECISIONS:
+        # Les artefacts manquants (export ONNX, modèle INT8) sont générés au passage
+        backend, model_info = load_backend(precision=precision, export=True)
+        class_mapping, transform = inference_helpers(model_info, backend)
+        backend.infer(samples[0][0], transform)  # préchauffage
+        results[precision] = _evaluate(backend, transform, class_mapping, samples)
+        results[precision]["engine"] = "ONNX Runtime" if backend.name == "onnx" else "PyTorch"
+
+    fp32, int8 = results["fp32"], results["int8"]
+    agreement = sum(a == b for a, b in zip(fp32["predictions"], int8["predictions"])) / len(samples)
+
+    print(f"{len(samples)} image(s)\n")
+    print(f"{'':6} {'moteur':14} {'top-1':>7} {'top-5':>7} {'latence':>10}")
+    for precision in PRECISIONS:
+        r = results[precision]
+        print(f"{precision:6} {r['engine']:14} {r['top1']:7.1%} {r['top5']:7.1%} {r['latency_ms']:8.0f} ms")
+    speedup = fp32["latency_ms"] / int8["latency_ms"] if int8["latency_ms"] else 0.0
+    print(f"\nAccord top-1 int8 / fp32 : {agreement:.1%} ; accélération : x{speedup:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Index hors ligne de présence des espèces, construit à partir d'un export d'observations (iNaturalist, GBIF...).
+
+Le globe est découpé en cellules de cell_deg degrés ; chaque cellule occupée porte un bitset des taxons
+observés. Savoir si un taxon a été vu à moins de R km revient à faire le OU des bitsets des cellules
+du voisinage : quelques dizaines de microsecondes, sans réseau.
+
+    python -m detect_specie.range_index observations.csv [--cell-deg 1.0]
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from editor.geo import KM_PER_DEG, find_column
+
+RANGE_INDEX_PATH = Path.home() / ".exiftools" / "species_range"
+
+DEFAULT_CELL_DEG = 1.0
+
+_NAME_COLUMNS = ("scientific_name", "scientificname", "taxon_name", "species")
+_LAT_COLUMNS = ("latitude", "decimallatitude", "lat")
+_LON_COLUMNS = ("longitude", "decimallongitude", "lon", "lng")
+
+
+def _normalize(name):
+    return " ".join((name or "").lower().split()[:2])
+
+
+class SpeciesRangeIndex:
+    def __init__(self, taxa, cells, bits, cell_deg=DEFAULT_CELL_DEG):
+        self.taxa = list(taxa)
+        self.taxon_index = {name: i for i, name in enumerate(self.taxa)}
+        self.cells = cells  # identifiants de cellules occupées, triés
+        self.bits = bits  # uint8 [len(cells), ceil(len(taxa) / 8)], ordre des bits "little"
+        self.cell_deg = cell_deg
+        self._rows = int(math.ceil(180 / cell_deg))
+        self._cols = int(math.ceil(360 / cell_deg))
+        # Plusieurs candidats sont vérifiés au même endroit : on garde le dernier voisinage calculé
+        self._last_query = None
+        # (table de classes, nombre de classes, taxon_ids) du dernier modèle aligné sur l'index
+        self._alignment = None
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def build(cls, observations, cell_deg=DEFAULT_CELL_DEG):
+        """observations : itérable de (nom scientifique, latitude, longitude)."""
+        taxon_index = {}
+        cell_ids, taxon_ids = array("q"), array("q")
+        rows, cols = int(math.ceil(180 / cell_deg)), int(math.ceil(360 / cell_deg))
+
+        for name, lat, lon in observations:
+            name = _normalize(name)
+            if not name:
+                continue
+            taxon = taxon_index.setdefault(name, len(taxon_index))
+            row = min(int((lat + 90) / cell_deg), rows - 1)
+            col = int(((lon + 180) % 360) / cell_deg) % cols
+            cell_ids.append(row * cols + col)
+            taxon_ids.append(taxon)
+
+        n_taxa = len(taxon_index)
+        pairs = np.unique(np.frombuffer(cell_ids, dtype=np.int64) * max(n_taxa, 1) + np.frombuffer(taxon_ids, dtype=np.int64))
+        pair_cells, pair_taxa = pairs // max(n_taxa, 1), pairs % max(n_taxa, 1)
+
+        cells, cell_pos = np.unique(pair_cells, return_inverse=True)
+        bits = np.zeros((cells.size, (n_taxa + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(bits, (cell_pos, pair_taxa >> 3), (1 << (pair_taxa & 7)).astype(np.uint8))
+
+        taxa = sorted(taxon_index, key=taxon_index.get)
+        return cls(taxa, cells, bits, cell_deg)
+
+    @classmethod
+    def from_csv(cls, path, cell_deg=DEFAULT_CELL_DEG):
+        def rows():
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.reader(f)
+                header = [h.strip().lower() for h in next(reader)]
+
+                i_name = find_column(header, _NAME_COLUMNS)
+                i_lat, i_lon = find_column(header, _LAT_COLUMNS), find_column(header, _LON_COLUMNS)
+                for row in reader:
+                    try:
+                        yield row[i_name], float(row[i_lat]), float(row[i_lon])
+                    except (IndexError, ValueError):
+                        continue
+
+        return cls.build(rows(), cell_deg)
+
+    def save(self, folder=RANGE_INDEX_PATH):
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        np.save(folder / "cells.npy", self.cells)
+        np.save(folder / "bits.npy", self.bits)
+        with open(folder / "index.json", "w", encoding="utf-8") as f:
+            json.dump({"cell_deg": self.cell_deg, "taxa": self.taxa}, f)
+
+    @classmethod
+    def load(cls, folder=RANGE_INDEX_PATH):
+        """Charge l'index (tableaux en mémoire partagée via mmap), ou None s'il n'a pas été construit."""
+        folder = Path(folder)
+        if not (folder / "index.json").exists():
+            return None
+        with open(folder / "index.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        cells = np.load(folder / "cells.npy", mmap_mode="r")
+        bits = np.load(folder / "bits.npy", mmap_mode="r")
+        return cls(meta["taxa"], cells, bits, meta["cell_deg"])
+
+    # ---------- Requêtes ----------
+
+    def _neighbour_rows(self, lat, lon, radius_km):
+        """Lignes de self.bits des cellules occupées dans le rectangle englobant le cercle de rayon radius_km."""
+        last = self._last_query
+        if last is not None and last[0] == (lat, lon, radius_km):
+            return last[1]
+        rows = self._compute_neighbour_rows(lat, lon, radius_km)
+        self._last_query = ((lat, lon, radius_km), rows)
+        return rows
+
+    def _compute_neighbour_rows(self, lat, lon, radius_km):
+        d_lat = radius_km / KM_PER_DEG
+        row_min = max(int((lat - d_lat + 90) / self.cell_deg), 0)
+        row_max = min(int((lat + d_lat + 90) / self.cell_deg), self._rows - 1)
+
+        # La largeur en longitude est prise à la latitude la plus proche du pôle pour couvrir tout le cercle
+        extreme_lat = min(abs(lat) + d_lat, 89.9)
+        d_lon = radius_km / (KM_PER_DEG * math.cos(math.radians(extreme_lat)))
+        if d_lon >= 180:
+            cols = np.arange(self._cols)
+        else:
+            col_min = int(math.floor((lon - d_lon + 180) / self.cell_deg))
+            col_max = int(math.floor((lon + d_lon + 180) / self.cell_deg))
+            cols = np.arange(col_min, col_max + 1) % self._cols
+
+        if self.cells.size == 0:
+            return np.empty(0, dtype=np.intp)
+        candidates = np.unique(np.arange(row_min, row_max + 1)[:, None] * self._cols + cols[None, :])
+        pos = np.minimum(np.searchsorted(self.cells, candidates), self.cells.size - 1)
+        return pos[self.cells[pos] == candidates]
+
+    def presence(self, lat, lon, radius_km=500):
+        """Bitset (uint8, little) des taxons observés à moins de radius_km (à la taille des cellules près)."""
+        rows = self._neighbour_rows(lat, lon, radius_km)
+        if rows.size == 0:
+            return np.zeros(self.bits.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bits[rows], axis=0)
+
+    def taxon_ids(self, names):
+        """Indice de taxon de chaque nom (-1 si inconnu de l'index), pour aligner l'index sur les classes du modèle."""
+        return np.array([self.taxon_index.get(_normalize(name), -1) for name in names], dtype=np.int64)
+
+    def aligned_taxon_ids(self, class_mapping, num_classes, name_of):
+        """
+        taxon_ids des classes 0..num_classes-1 du modèle (name_of(indice, class_mapping) -> nom),
+        calculés une fois par table de classes. La table est gardée en référence : elle ne peut pas
+        être remplacée par un autre objet de même id.
+        """
+        alignment = self._alignment
+        if alignment is not None and alignment[0] is class_mapping and alignment[1] == num_classes:
+            return alignment[2]
+        ids = self.taxon_ids(name_of(i, class_mapping) for i in range(num_classes))
+        self._alignment = (class_mapping, num_classes, ids)
+        return ids
+
+    def prior(self, taxon_ids, lat, lon, radius_km=500, absent_weight=0.01):
+        """
+        Vecteur de poids a priori aligné sur taxon_ids : 1 si le taxon est observé à moins de radius_km,
+        absent_weight sinon (taxons absents ou inconnus de l'index).
+        """
+        if self.cells.size == 0 or not self.taxa:
+            # Index vide : aucune information, le classement du modèle reste inchangé
+            return np.ones(len(taxon_ids))
+        present = np.unpackbits(self.presence(lat, lon, radius_km), bitorder="little")
+        known = taxon_ids >= 0
+        observed = known & present[np.where(known, taxon_ids, 0)].astype(bool)
+        return np.where(observed, 1.0, absent_weight)
+
+    def is_observed(self, scientific_name, lat, lon, radius_km=500):
+        """Même contrat que is_species_at_location, sans appel réseau."""
+        if not scientific_name or lat is None or lon is None:
+            return False
+        taxon = self.taxon_index.get(_normalize(scientific_name))
+        if taxon is None:
+            return False
+        rows = self._neighbour_rows(lat, lon, radius_km)
+        return bool(np.any(self.bits[rows, taxon >> 3] & (1 << (taxon & 7))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m detect_specie.range_index",
+                                     description="Construit l'index hors ligne de présence des espèces.")
+    parser.add_argument("observations", help="CSV avec scientific_name, latitude, longitude")
+    parser.add_argument("--cell-deg", type=float, default=DEFAULT_CELL_DEG, help="Taille des cellules en degrés")
+    parser.add_argument("-o", "--output", default=str(RANGE_INDEX_PATH), help="Dossier de l'index")
+    args = parser.parse_args(argv)
+
+    index = SpeciesRangeIndex.from_csv(args.observations, args.cell_deg)
+    index.save(args.output)
+    print(f"{len(index.taxa)} taxons, {index.cells.size} cellules -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
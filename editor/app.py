@@ -9,8 +9,9 @@ from PyQt6.QtWidgets import QApplication, QMessageBox
 
 from editor import resource_path
 from editor.main_window import MainWindow
+from editor.map_panel import register_tile_scheme
+from editor.shared_data import VERSION
 
-VERSION = "2.0.5"
 GITHUB_REPO = "julsql/exif-tools"
 
 
@@ -40,6 +41,7 @@ def check_update_qt(parent=None) -> None:
 
 
 def main_qt() -> None:
+    register_tile_scheme()
     app = QApplication(sys.argv)
     app.setApplicationName("ExifTools")
 
@@ -0,0 +1,304 @@
+# python
+"""
+Traitement par lots sans interface graphique : date, coordonnées GPS et renommage.
+
+    python -m editor.cli DOSSIER_OU_GLOB... [--date DATE] [--lat LAT --lon LON | --track GPX] [--rename MODELE] [--dry-run]
+
+N'importe ni PyQt ni le moteur web : utilisable sur une machine sans affichage.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from string import Formatter
+from typing import Iterable, List, Optional
+
+from PIL import Image
+
+from editor.exif_editor_service import PLACE_TOKENS, ExifEditorService
+from editor.exif_utils import get_exif, read_metadata
+from editor.geotag import DEFAULT_MAX_GAP_S, load_track, photo_timestamp
+from editor.shared_data import StyleData
+
+
+@dataclass(frozen=True)
+class BatchOptions:
+    date: Optional[str] = None  # "" = suppression
+    latitude: Optional[str] = None  # "" = suppression
+    longitude: Optional[str] = None
+    rename: Optional[str] = None  # modèle : {name}, {date:%Y-%m-%d}, {device}, {n}, {place}, {region}, {country}
+
+
+@dataclass(frozen=True)
+class FileResult:
+    path: str
+    target: str
+    date: str
+    latitude: str
+    longitude: str
+    error: Optional[str] = None
+
+
+def collect_paths(patterns: Iterable[str], recursive: bool = False) -> List[str]:
+    """Développe dossiers et motifs glob en une liste triée d'images, sans doublons."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            if recursive:
+                for root, _, files in os.walk(pattern):
+                    paths.extend(os.path.join(root, f) for f in files)
+            else:
+                with os.scandir(pattern) as it:
+                    paths.extend(entry.path for entry in it if entry.is_file())
+        else:
+            paths.extend(glob.glob(pattern, recursive=recursive))
+
+    images = {
+        os.path.abspath(p)
+        for p in paths
+        if os.path.isfile(p) and os.path.splitext(p)[1].lower() in StyleData.EXTENSIONS_LIST
+    }
+    return sorted(images)
+
+
+def _parse_displayed_date(date_str: str) -> Optional[datetime]:
+    for fmt in StyleData.ACCEPTED_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def plan_file(path: str, index: int, options: BatchOptions) -> FileResult:
+    """Calcule les valeurs à écrire et le chemin final d'un fichier, sans rien modifier."""
+    service = ExifEditorService(StyleData())
+    try:
+        meta = read_metadata(path)
+
+        # Champs non demandés : on réécrit la valeur actuelle, comme le fait l'éditeur
+        date = options.date if options.date is not None else (meta.date_taken or "")
+        lat = options.latitude if options.latitude is not None else ("" if meta.latitude is None else str(meta.latitude))
+        lon = options.longitude if options.longitude is not None else ("" if meta.longitude is None else str(meta.longitude))
+
+        if service.parse_date_to_exif(date) is None:
+            raise ValueError("Format de date incorrect")
+        if service.parse_coordinate(lat) is None or service.parse_coordinate(lon) is None:
+            raise ValueError("Coordonnées invalides")
+
+        target = _rename_target(service, path, index, options, meta, date, lat, lon)
+        return FileResult(path, target, date, lat, lon)
+    except Exception as e:
+        return FileResult(path, path, "", "", "", error=str(e))
+
+
+def _template_fields(template: Optional[str]) -> set:
+    """Noms des champs utilisés par le modèle ("{date:%Y}", "{date.year}" -> "date")."""
+    if not template:
+        return set()
+    return {re.split(r"[.\[]", field, 1)[0] for _, field, _, _ in Formatter().parse(template) if field}
+
+
+def _uses_place_tokens(template: Optional[str]) -> bool:
+    return bool(_template_fields(template) & set(PLACE_TOKENS))
+
+
+def _rename_target(service: ExifEditorService, path: str, index: int, options: BatchOptions, meta, date, lat, lon) -> str:
+    if not options.rename:
+        return path
+    if "date" in _template_fields(options.rename) and not date:
+        raise ValueError("Pas de date de prise de vue")
+    # Le géocodeur n'est interrogé que si le modèle contient un jeton de lieu
+    places = service.place_fields(lat, lon) if _uses_place_tokens(options.rename) else dict.fromkeys(PLACE_TOKENS, "")
+    name = options.rename.format(
+        name=meta.name,
+        date=_parse_displayed_date(date) if date else None,
+        device=meta.device or "",
+        n=index,
+        **places,
+    )
+    return service.build_final_path(path, service.parse_name(name))
+
+
+def _replan_rename(plan: FileResult, index: int, options: BatchOptions) -> FileResult:
+    """Recalcule le nom d'un fichier dont les coordonnées ont changé après la planification (trace GPX)."""
+    if plan.error:
+        return plan
+    service = ExifEditorService(StyleData())
+    try:
+        meta = read_metadata(plan.path)
+        target = _rename_target(service, plan.path, index, options, meta, plan.date, plan.latitude, plan.longitude)
+        return replace(plan, target=target)
+    except Exception as e:
+        return replace(plan, error=str(e))
+
+
+def apply_file(plan: FileResult) -> FileResult:
+    """Écrit les métadonnées planifiées et renomme le fichier."""
+    if plan.error:
+        return plan
+    service = ExifEditorService(StyleData())
+    try:
+        # Ouverture paresseuse : seuls les en-têtes sont lus ; l'EXIF est parsé avant de refermer le fichier
+        with Image.open(plan.path) as image:
+            get_exif(image)
+        final_path = service.save_exif_and_rename(
+            image,
+            plan.path,
+            "",
+            plan.date,
+            plan.latitude,
+            plan.longitude,
+            new_path=plan.target if plan.target != plan.path else None,
+        )
+        return replace(plan, target=final_path)
+    except Exception as e:
+        return replace(plan, error=str(e))
+
+
+def _resolve_conflicts(plans: List[FileResult]) -> List[FileResult]:
+    """Refuse les renommages vers un fichier existant ou vers une cible déjà prise par le lot."""
+    sources = {p.path for p in plans}
+    taken = set()
+    resolved = []
+    for plan in plans:
+        if not plan.error and plan.target != plan.path:
+            if plan.target in taken or (os.path.exists(plan.target) and plan.target not in sources):
+                plan = replace(plan, error=f"Le fichier {os.path.basename(plan.target)} existe déjà")
+            elif plan.target in sources:
+                plan = replace(plan, error=f"{os.path.basename(plan.target)} fait aussi partie du lot")
+        taken.add(plan.target if not plan.error else plan.path)
+        resolved.append(plan)
+    return resolved
+
+
+def _apply_track(plans: List[FileResult], track_path: str, offset_s: float, max_gap_s: float) -> List[FileResult]:
+    """Remplace les coordonnées planifiées par la position interpolée sur la trace à la date de chaque photo."""
+    track = load_track(track_path)
+    timestamps = [
+        photo_timestamp(_parse_displayed_date(p.date) if p.date and not p.error else None, offset_s)
+        for p in plans
+    ]
+    lats, lons, found = track.locate(timestamps, max_gap_s)
+
+    located = []
+    for plan, lat, lon, ok in zip(plans, lats, lons, found):
+        if plan.error:
+            pass
+        elif not plan.date:
+            plan = replace(plan, error="Pas de date de prise de vue")
+        elif not ok:
+            plan = replace(plan, error=f"Aucun point de trace à moins de {max_gap_s:g} s")
+        else:
+            plan = replace(plan, latitude=str(round(float(lat), 7)), longitude=str(round(float(lon), 7)))
+        located.append(plan)
+    return located
+
+
+def run_batch(
+    paths: List[str],
+    options: BatchOptions,
+    dry_run: bool = False,
+    workers: Optional[int] = None,
+    track_path: Optional[str] = None,
+    time_offset_s: float = 0.0,
+    max_gap_s: float = DEFAULT_MAX_GAP_S,
+) -> List[FileResult]:
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (8 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        plans = list(pool.map(plan_file, paths, range(1, len(paths) + 1), [options] * len(paths), chunksize=chunksize))
+        if track_path:
+            plans = _apply_track(plans, track_path, time_offset_s, max_gap_s)
+            if _uses_place_tokens(options.rename):
+                plans = list(pool.map(_replan_rename, plans, range(1, len(plans) + 1), [options] * len(plans),
+                                      chunksize=chunksize))
+        plans = _resolve_conflicts(plans)
+        if dry_run:
+            return plans
+        return list(pool.map(apply_file, plans, chunksize=chunksize))
+
+
+def _print_report(results: List[FileResult], dry_run: bool) -> None:
+    for r in results:
+        if r.error:
+            print(f"ERREUR  {r.path} : {r.error}")
+            continue
+        rename = f" -> {os.path.basename(r.target)}" if r.target != r.path else ""
+        gps = f"{r.latitude}, {r.longitude}" if r.latitude or r.longitude else "-"
+        print(f"{'PRÉVU ' if dry_run else 'OK    '}  {r.path}{rename} | date : {r.date or '-'} | gps : {gps}")
+
+    errors = sum(1 for r in results if r.error)
+    print(f"\n{len(results)} fichier(s), {len(results) - errors} {'à traiter' if dry_run else 'traité(s)'}, {errors} erreur(s)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m editor.cli", description="Modification EXIF par lots.")
+    parser.add_argument("paths", nargs="+", help="Dossiers, fichiers ou motifs glob")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Parcourt les sous-dossiers (et ** des motifs)")
+    parser.add_argument("--date", help="Nouvelle date de prise de vue (formats acceptés par l'éditeur)")
+    parser.add_argument("--clear-date", action="store_true", help="Supprime la date de prise de vue")
+    parser.add_argument("--lat", help="Nouvelle latitude (degrés décimaux)")
+    parser.add_argument("--lon", help="Nouvelle longitude (degrés décimaux)")
+    parser.add_argument("--clear-gps", action="store_true", help="Supprime les coordonnées GPS")
+    parser.add_argument("--track", help="Trace GPX ou CSV (time, lat, lon) : géolocalise chaque photo d'après sa date")
+    parser.add_argument("--time-offset", type=float, default=0.0,
+                        help="Secondes à ajouter à l'heure de l'appareil pour obtenir l'UTC (UTC+2 : -7200)")
+    parser.add_argument("--max-gap", type=float, default=DEFAULT_MAX_GAP_S,
+                        help=f"Écart maximal en secondes avec la trace (défaut : {DEFAULT_MAX_GAP_S:g})")
+    parser.add_argument("--rename", help="Modèle de nom : {name}, {date:%%Y-%%m-%%d %%H-%%M-%%S}, {device}, {n}, "
+                             "{place}, {region}, {country} (index python -m editor.geocoder)")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Affiche les changements sans rien écrire")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Nombre de processus (défaut : nombre de CPU)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if (args.lat is None) != (args.lon is None):
+        parser.error("--lat et --lon doivent être fournis ensemble")
+    if args.clear_gps and args.lat is not None:
+        parser.error("--clear-gps est incompatible avec --lat/--lon")
+    if args.track and (args.lat is not None or args.clear_gps):
+        parser.error("--track est incompatible avec --lat/--lon et --clear-gps")
+    if args.clear_date and args.date is not None:
+        parser.error("--clear-date est incompatible avec --date")
+    if args.track and (args.date is not None or args.clear_date):
+        # La trace est interpolée à la date de chaque photo : une date commune les placerait toutes au même point
+        parser.error("--track est incompatible avec --date et --clear-date")
+
+    options = BatchOptions(
+        date="" if args.clear_date else args.date,
+        latitude="" if args.clear_gps else args.lat,
+        longitude="" if args.clear_gps else args.lon,
+        rename=args.rename,
+    )
+
+    paths = collect_paths(args.paths, recursive=args.recursive)
+    if not paths:
+        print("Aucune image trouvée.")
+        return 1
+
+    results = run_batch(
+        paths,
+        options,
+        dry_run=args.dry_run,
+        workers=args.workers,
+        track_path=args.track,
+        time_offset_s=args.time_offset,
+        max_gap_s=args.max_gap,
+    )
+    _print_report(results, args.dry_run)
+    return 1 if any(r.error for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,8 +9,13 @@ from typing import Optional
 import piexif
 from PIL import Image
 
+from editor.exif_utils import copy_exif
+from editor.exif_writer import write_exif
+from editor.geocoder import default_geocoder
 from editor.shared_data import StyleData
 
+PLACE_TOKENS = ("place", "region", "country")
+
 
 class ExifEditorService:
     def __init__(self, style_data: StyleData):
@@ -52,7 +57,6 @@ class ExifEditorService:
         if not (image and current_path):
             return None
 
-        name = self.parse_name(name_str)
         date = self.parse_date_to_exif(date_str)
         latitude = self.parse_coordinate(latitude_str)
         longitude = self.parse_coordinate(longitude_str)
@@ -62,24 +66,43 @@ class ExifEditorService:
         if latitude is None or longitude is None:
             # Autorise la suppression via "" mais pas les valeurs non parseables
             raise ValueError("Coordonnées invalides")
+        name = self.parse_name(self.expand_place_tokens(name_str, latitude, longitude))
 
         exif_bytes = self._update_exif_metadata(image, date, latitude, longitude)
-        piexif.insert(exif_bytes, current_path)
+        write_exif(exif_bytes, current_path)
 
-        if new_path:
-            final_path = new_path
-        elif name:
-            ext = os.path.splitext(current_path)[1]
-            safe_name = "".join(c for c in name if c.isalnum() or c in (" ", "_", "-")).rstrip()
-            final_path = os.path.join(os.path.dirname(current_path), f"{safe_name}{ext}")
-        else:
-            final_path = current_path
+        final_path = new_path or self.build_final_path(current_path, name)
 
         if final_path != current_path:
             os.rename(current_path, final_path)
 
         return final_path
 
+    def place_fields(self, latitude, longitude) -> dict:
+        """Valeurs des jetons de lieu ({place}, {region}, {country}) ; vides sans coordonnées ni lieu proche."""
+        fields = dict.fromkeys(PLACE_TOKENS, "")
+        if latitude in (None, "") or longitude in (None, ""):
+            return fields
+        place = default_geocoder().lookup(float(latitude), float(longitude))
+        if place is not None:
+            fields.update(place=place.name, region=place.region, country=place.country)
+        return fields
+
+    def expand_place_tokens(self, name: str, latitude, longitude) -> str:
+        """Remplace {place}, {region} et {country} par le lieu le plus proche des coordonnées (hors ligne)."""
+        if not name or not any(f"{{{token}}}" in name for token in PLACE_TOKENS):
+            return name
+        for token, value in self.place_fields(latitude, longitude).items():
+            name = name.replace(f"{{{token}}}", value)
+        return name
+
+    def build_final_path(self, current_path: str, name: str) -> str:
+        if not name:
+            return current_path
+        ext = os.path.splitext(current_path)[1]
+        safe_name = "".join(c for c in name if c.isalnum() or c in (" ", "_", "-")).rstrip()
+        return os.path.join(os.path.dirname(current_path), f"{safe_name}{ext}")
+
     def _decimal_to_dms_rational(self, deg: float):
         d = int(deg)
         m = int((deg - d) * 60)
@@ -87,10 +110,11 @@ class ExifEditorService:
         return [(d, 1), (m, 1), (s, 10000)]
 
     def _update_exif_metadata(self, image: Image.Image, date, latitude, longitude) -> bytes:
-        exif_data = image.info.get("exif")
-        if exif_data:
-            exif_dict = piexif.load(exif_data)
-        else:
+        # Réutilise le parsing fait à l'ouverture (copie : le cache ne doit pas être modifié)
+        exif_dict = copy_exif(image)
+        if exif_dict is None:
+            if image.info.get("exif"):
+                raise ValueError("Métadonnées EXIF illisibles")
             exif_dict = {"0th": {}, "Exif": {}, "GPS": {}}
 
         if date is not None:
@@ -1,25 +1,33 @@
 # python
 from __future__ import annotations
 
+import copy
 import os
 import re
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Tuple
 
 import piexif
 from PIL import Image
 
+from editor.shared_data import StyleData
+
 
 def get_name(path: str) -> str:
     return ".".join(os.path.basename(path).split(".")[:-1])
 
 
-def get_weight(path: str) -> str:
-    size_bytes = os.path.getsize(path)
+def format_weight(size_bytes: int) -> str:
     size_kb = size_bytes / 1024
     return f"{size_kb:.2f} Ko"
 
 
+def get_weight(path: str) -> str:
+    return format_weight(os.path.getsize(path))
+
+
 def get_size(image: Image.Image) -> str:
     return f"{image.width} x {image.height}"
 
@@ -28,10 +36,40 @@ def get_format(image: Image.Image) -> Optional[str]:
     return image.format
 
 
+_EXIF_CACHE_ATTR = "_exiftools_exif"
+
+
+def get_exif(image: Optional[Image.Image]) -> Optional[dict]:
+    """
+    Parse le bloc EXIF de l'image une seule fois et garde le résultat sur l'objet image.
+    Le cache est invalidé si image.info["exif"] est remplacé. Retourne None si absent ou illisible.
+    Le dictionnaire est partagé : le copier (copy_exif) avant de le modifier.
+    """
+    if image is None:
+        return None
+    raw = image.info.get("exif")
+    cached = getattr(image, _EXIF_CACHE_ATTR, None)
+    if cached is not None and cached[0] is raw:
+        return cached[1]
+
+    exif_dict = None
+    if raw:
+        try:
+            exif_dict = piexif.load(raw)
+        except Exception:
+            exif_dict = None
+    setattr(image, _EXIF_CACHE_ATTR, (raw, exif_dict))
+    return exif_dict
+
+
+def copy_exif(image: Optional[Image.Image]) -> Optional[dict]:
+    exif_dict = get_exif(image)
+    return copy.deepcopy(exif_dict) if exif_dict is not None else None
+
+
 def get_device(image: Image.Image) -> Optional[str]:
-    try:
-        exif_dict = piexif.load(image.info["exif"])
-    except Exception:
+    exif_dict = get_exif(image)
+    if exif_dict is None:
         return None
 
     make = exif_dict.get("0th", {}).get(piexif.ImageIFD.Make, b"").decode("utf-8", errors="ignore")
@@ -99,17 +137,15 @@ def _get_geotagging(exif_data) -> Tuple[Optional[float], Optional[float]]:
 
 
 def get_coordinates(image: Image.Image) -> Tuple[Optional[float], Optional[float]]:
-    try:
-        exif_data = piexif.load(image.info["exif"])
-    except Exception:
+    exif_data = get_exif(image)
+    if exif_data is None:
         return None, None
     return _get_geotagging(exif_data)
 
 
 def get_date_taken(image: Image.Image, exif_date_format: str, displayed_date_format: str) -> Optional[str]:
-    try:
-        exif_data = piexif.load(image.info["exif"])
-    except Exception:
+    exif_data = get_exif(image)
+    if exif_data is None:
         return None
 
     date_tags = [
@@ -133,4 +169,91 @@ def get_date_taken(image: Image.Image, exif_date_format: str, displayed_date_for
 
 def has_specie(name: str) -> bool:
     parts = (name or "").split(" ")
-    return len(parts) > 2 and parts[0][:1].isupper() and parts[1][:1].islower()
\ No newline at end of file
+    return len(parts) > 2 and parts[0][:1].isupper() and parts[1][:1].islower()
+
+
+def with_name_prefix(name: str, prefix: str) -> str:
+    """Préfixe le nom par l'espèce, en remplaçant l'espèce déjà présente le cas échéant."""
+    current = (name or "").strip()
+    if has_specie(current):
+        current = " ".join(current.split(" ")[2:])
+    return f"{prefix} {current}".strip()
+
+
+# ---------- Lecture des métadonnées sans décoder les pixels ----------
+
+# Orientations EXIF qui échangent largeur et hauteur une fois l'image redressée
+SWAPPED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+@dataclass(frozen=True)
+class ImageMetadata:
+    path: str
+    name: str
+    format: Optional[str]
+    size_bytes: int
+    mtime: float
+    width: int
+    height: int
+    device: Optional[str]
+    date_taken: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+    @property
+    def weight(self) -> str:
+        return format_weight(self.size_bytes)
+
+    @property
+    def dimensions(self) -> str:
+        return f"{self.width} x {self.height}"
+
+    @property
+    def date_modify(self) -> datetime:
+        return datetime.fromtimestamp(self.mtime)
+
+    @property
+    def coordinates(self) -> Tuple[Optional[float], Optional[float]]:
+        return self.latitude, self.longitude
+
+
+def read_metadata(path: str) -> ImageMetadata:
+    """
+    Lit les métadonnées d'une image à partir de ses en-têtes uniquement.
+    Image.open est paresseux : seuls les segments APP1/TIFF et l'en-tête SOF sont lus, les pixels
+    ne sont jamais décodés. Les dimensions sont celles de l'image redressée (comme exif_transpose).
+    Le résultat est mis en cache par (chemin, date de modification, taille).
+    """
+    st = os.stat(path)
+    return _read_metadata_cached(path, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=4096)
+def _read_metadata_cached(path: str, mtime_ns: int, size_bytes: int) -> ImageMetadata:
+    with Image.open(path) as image:
+        width, height = image.size
+        image_format = image.format
+        exif_dict = get_exif(image)
+        device = get_device(image)
+        date_taken = get_date_taken(image, StyleData.EXIF_DATE_FORMAT, StyleData.DISPLAYED_DATE_FORMAT)
+
+    lat, lon = (None, None)
+    if exif_dict is not None:
+        lat, lon = _get_geotagging(exif_dict)
+        orientation = exif_dict.get("0th", {}).get(piexif.ImageIFD.Orientation)
+        if orientation in SWAPPED_ORIENTATIONS:
+            width, height = height, width
+
+    return ImageMetadata(
+        path=path,
+        name=get_name(path),
+        format=image_format,
+        size_bytes=size_bytes,
+        mtime=mtime_ns / 1e9,
+        width=width,
+        height=height,
+        device=device,
+        date_taken=date_taken,
+        latitude=lat,
+        longitude=lon,
+    )
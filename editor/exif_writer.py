@@ -0,0 +1,123 @@
+# python
+from __future__ import annotations
+
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+import piexif
+
+_SOI = b"\xff\xd8"
+_SOS = b"\xff\xda"
+_APP0 = b"\xff\xe0"
+_APP1 = b"\xff\xe1"
+_EXIF_HEADER = b"Exif\x00\x00"
+
+# Un segment JPEG est limité à 65535 octets, marqueur exclu (longueur comprise)
+_MAX_SEGMENT_LENGTH = 0xFFFF
+# Marge réservée lors d'une réécriture complète pour que les éditions suivantes tiennent en place
+EXIF_PADDING = 4096
+
+
+@dataclass(frozen=True)
+class _Segment:
+    offset: int  # position du marqueur 0xFF 0xEx
+    length: int  # longueur totale, marqueur compris
+
+
+def _find_segments(f: BinaryIO) -> tuple[Optional[_Segment], Optional[_Segment]]:
+    """Parcourt les en-têtes jusqu'à SOS et renvoie (APP0, APP1 Exif)."""
+    f.seek(2)
+    app0 = None
+    exif = None
+    while True:
+        head = f.read(4)
+        if len(head) < 4 or head[0:1] != b"\xff" or head[0:2] == _SOS:
+            break
+        offset = f.tell() - 4
+        length = struct.unpack(">H", head[2:4])[0]
+        if head[0:2] == _APP0 and app0 is None:
+            app0 = _Segment(offset, length + 2)
+        elif head[0:2] == _APP1 and exif is None:
+            if f.read(len(_EXIF_HEADER)) == _EXIF_HEADER:
+                exif = _Segment(offset, length + 2)
+                break
+        f.seek(offset + 2 + length)
+    return app0, exif
+
+
+def _build_segment(exif_bytes: bytes, total_length: Optional[int] = None) -> bytes:
+    """Construit un segment APP1, complété par des zéros jusqu'à total_length si fourni."""
+    payload = exif_bytes
+    if total_length is not None:
+        payload += b"\x00" * (total_length - 4 - len(exif_bytes))
+    if len(payload) + 2 > _MAX_SEGMENT_LENGTH:
+        raise ValueError("Métadonnées EXIF trop volumineuses")
+    return _APP1 + struct.pack(">H", len(payload) + 2) + payload
+
+
+def _patch_in_place(path: str, segment: _Segment, data: bytes) -> None:
+    with open(path, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as mm:
+            mm[segment.offset:segment.offset + len(data)] = data
+            mm.flush()
+    # mmap ne met pas toujours à jour la date de modification (utilisée comme clé de cache)
+    os.utime(path)
+
+
+def _rewrite(path: str, app0: Optional[_Segment], exif: Optional[_Segment], data: bytes) -> None:
+    """Réécrit le fichier dans un temporaire du même dossier puis le substitue atomiquement."""
+    if exif is not None:
+        head_end, tail_start = exif.offset, exif.offset + exif.length
+    else:
+        head_end = app0.offset + app0.length if app0 is not None else 2
+        tail_start = head_end
+
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".exiftools-", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as out, open(path, "rb") as src:
+            out.write(src.read(head_end))
+            out.write(data)
+            src.seek(tail_start)
+            shutil.copyfileobj(src, out, 1024 * 1024)
+            out.flush()
+            os.fsync(out.fileno())
+        # Droits seulement : la date de modification doit changer (clé du cache des images)
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_exif(exif_bytes: bytes, path: str) -> None:
+    """
+    Remplace le segment EXIF d'un JPEG sans réécrire le fichier quand c'est possible.
+    Si le nouveau bloc tient dans le segment APP1 existant, il est écrit en place (mmap) et complété
+    par des zéros. Sinon le fichier est recopié dans un temporaire renommé ensuite, avec une marge
+    (EXIF_PADDING) pour que les éditions suivantes tiennent en place.
+    Les formats autres que JPEG sont délégués à piexif.insert.
+    """
+    if exif_bytes[:len(_EXIF_HEADER)] != _EXIF_HEADER:
+        raise ValueError("Given data is not exif data")
+
+    with open(path, "rb") as f:
+        is_jpeg = f.read(2) == _SOI
+        app0, exif = _find_segments(f) if is_jpeg else (None, None)
+
+    if not is_jpeg:
+        piexif.insert(exif_bytes, path)
+        return
+
+    if exif is not None and len(exif_bytes) + 4 <= exif.length:
+        _patch_in_place(path, exif, _build_segment(exif_bytes, exif.length))
+        return
+
+    reserved = min(len(exif_bytes) + 4 + EXIF_PADDING, _MAX_SEGMENT_LENGTH + 2)
+    _rewrite(path, app0, exif, _build_segment(exif_bytes, reserved))
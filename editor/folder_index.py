@@ -0,0 +1,138 @@
+# python
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from editor.exif_utils import ImageMetadata, read_metadata
+from editor.shared_data import StyleData
+
+
+class FolderIndex:
+    """
+    Index persistant (SQLite sous ~/.exiftools/) des images de chaque dossier ouvert.
+    Stocke pour chaque fichier ctime, mtime, taille et les métadonnées extraites. Un dossier dont la date
+    de modification n'a pas changé depuis le dernier scan n'est pas relu ; sinon seul le différentiel
+    (fichiers ajoutés, modifiés, supprimés) est réécrit à partir des stat d'os.scandir.
+    """
+
+    # En dessous de cet écart, la date du dossier n'est pas fiable (résolution des FS, ajouts concurrents)
+    RACY_DELAY_S = 2.0
+
+    def __init__(self, db_path: Optional[str] = None):
+        if db_path is None:
+            home = os.path.expanduser("~")
+            db_path = os.path.join(home, ".exiftools", "index.sqlite")
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self.path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS folders (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                folder TEXT NOT NULL,
+                name TEXT NOT NULL,
+                ctime REAL NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                metadata TEXT,
+                PRIMARY KEY (folder, name)
+            );
+            CREATE INDEX IF NOT EXISTS files_order ON files (folder, ctime, name);
+            """
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def list_images(self, folder: str, force_rescan: bool = False) -> List[str]:
+        """Renvoie les chemins des images du dossier triés par date de création (ctime)."""
+        st = os.stat(folder)
+
+        with self._lock:
+            row = self._conn.execute("SELECT mtime_ns FROM folders WHERE path = ?", (folder,)).fetchone()
+            if force_rescan or row is None or row[0] != st.st_mtime_ns:
+                self._rescan(folder, st.st_mtime_ns)
+
+            names = self._conn.execute(
+                "SELECT name FROM files WHERE folder = ? ORDER BY ctime, name", (folder,)
+            ).fetchall()
+
+        return [os.path.join(folder, name) for (name,) in names]
+
+    def _rescan(self, folder: str, folder_mtime_ns: int) -> None:
+        known = {
+            name: (ctime, mtime_ns, size)
+            for name, ctime, mtime_ns, size in self._conn.execute(
+                "SELECT name, ctime, mtime_ns, size FROM files WHERE folder = ?", (folder,)
+            )
+        }
+
+        changed = []
+        seen = set()
+        with os.scandir(folder) as it:
+            for entry in it:
+                if os.path.splitext(entry.name)[1].lower() not in StyleData.EXTENSIONS_LIST:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    s = entry.stat()
+                except OSError:
+                    continue
+                seen.add(entry.name)
+                stat_key = (s.st_ctime, s.st_mtime_ns, s.st_size)
+                if known.get(entry.name) != stat_key:
+                    changed.append((folder, entry.name, *stat_key))
+
+        removed = [(folder, name) for name in known.keys() - seen]
+
+        # Date trop récente : on ne la mémorise pas pour forcer un nouveau scan la prochaine fois
+        if time.time() - folder_mtime_ns / 1e9 < self.RACY_DELAY_S:
+            folder_mtime_ns = -1
+
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (folder, name, ctime, mtime_ns, size, metadata) "
+                "VALUES (?, ?, ?, ?, ?, NULL)",
+                changed,
+            )
+            self._conn.executemany("DELETE FROM files WHERE folder = ? AND name = ?", removed)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO folders (path, mtime_ns) VALUES (?, ?)", (folder, folder_mtime_ns)
+            )
+
+    def get_metadata(self, path: str) -> ImageMetadata:
+        """Métadonnées du fichier, relues depuis les en-têtes seulement si le fichier a changé."""
+        folder, name = os.path.split(path)
+        st = os.stat(path)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, metadata FROM files WHERE folder = ? AND name = ?", (folder, name)
+            ).fetchone()
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size and row[2]:
+            return ImageMetadata(**json.loads(row[2]))
+
+        meta = read_metadata(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (folder, name, ctime, mtime_ns, size, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (folder, name, st.st_ctime, st.st_mtime_ns, st.st_size, json.dumps(dataclasses.asdict(meta))),
+            )
+        return meta
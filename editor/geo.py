@@ -0,0 +1,32 @@
+# python
+"""
+Constantes de distance et lecture de colonnes CSV, partagées par les index géographiques
+(SpatialIndex, SpeciesRangeIndex) et les lecteurs de traces et d'observations.
+"""
+from __future__ import annotations
+
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Rayon moyen de la Terre ; les kilomètres par degré en découlent pour que les rectangles englobants
+# et la distance haversine reposent sur le même modèle
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = math.radians(EARTH_RADIUS_KM)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def find_column(header: Sequence[str], names: Sequence[str], source: Optional[str] = None) -> int:
+    """Indice de la première colonne de header portant l'un des noms acceptés (header en minuscules)."""
+    for name in names:
+        if name in header:
+            return list(header).index(name)
+    where = f" dans {source}" if source else ""
+    raise ValueError(f"Colonne manquante{where} : {names[0]}")
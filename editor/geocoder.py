@@ -0,0 +1,238 @@
+# python
+"""
+Géocodage inverse hors ligne à partir d'un export GeoNames (cities500.txt, cities15000.txt...).
+
+Les lieux sont triés dans l'ordre de la grille de SpatialIndex et enregistrés en tableaux NumPy ;
+les noms sont concaténés dans un seul tableau d'octets avec leurs positions. Au chargement tout est
+projeté en mémoire (mmap) et la grille n'est calculée qu'à la première requête : charger l'index
+ne lit rien, et les processus d'un lot partagent les mêmes pages.
+
+    python -m editor.geocoder cities500.txt [--admin1 admin1CodesASCII.txt] [--countries countryInfo.txt]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from editor.spatial_index import SpatialIndex
+
+GEOCODER_PATH = Path.home() / ".exiftools" / "geonames"
+
+DEFAULT_CELL_DEG = 0.5
+DEFAULT_MAX_KM = 50.0
+
+# Colonnes du format "geoname" de GeoNames
+_COL_NAME, _COL_LAT, _COL_LON, _COL_COUNTRY, _COL_ADMIN1, _COL_POPULATION = 1, 4, 5, 8, 10, 14
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    region: str
+    country: str
+    country_code: str
+    distance_km: float
+
+
+def _pack(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatène les chaînes en (octets UTF-8, positions de début/fin)."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _read_tsv(path) -> Iterable[List[str]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            yield line.rstrip("\n").split("\t")
+
+
+def read_admin1(path) -> Dict[str, str]:
+    """admin1CodesASCII.txt : "FR.11" -> "Île-de-France"."""
+    return {row[0]: row[1] for row in _read_tsv(path) if len(row) > 1}
+
+
+def read_countries(path) -> Dict[str, str]:
+    """countryInfo.txt : "FR" -> "France"."""
+    return {row[0]: row[4] for row in _read_tsv(path) if len(row) > 4}
+
+
+class ReverseGeocoder:
+    def __init__(self, lats, lons, names, name_offsets, regions, region_offsets, region_ids, country_codes,
+                 countries: Optional[Dict[str, str]] = None, cell_deg: float = DEFAULT_CELL_DEG):
+        self._lats, self._lons = lats, lons
+        self._index: Optional[SpatialIndex] = None
+        self._names, self._name_offsets = names, name_offsets
+        self._regions, self._region_offsets = regions, region_offsets
+        self._region_ids = region_ids  # int32, -1 si inconnue
+        self._country_codes = country_codes  # "S2"
+        self.countries = countries or {}
+        self.cell_deg = cell_deg
+
+    def __len__(self) -> int:
+        return len(self._lats)
+
+    @property
+    def index(self) -> SpatialIndex:
+        """Index spatial des lieux, construit au premier accès (lit toutes les coordonnées)."""
+        if self._index is None:
+            # Les lieux sont déjà dans l'ordre de la grille : la position sert d'identifiant
+            self._index = SpatialIndex(self._lats, self._lons, range(len(self._lats)), self.cell_deg)
+        return self._index
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def from_geonames(cls, path, admin1: Optional[Dict[str, str]] = None, countries: Optional[Dict[str, str]] = None,
+                      min_population: int = 0, cell_deg: float = DEFAULT_CELL_DEG) -> "ReverseGeocoder":
+        admin1 = admin1 or {}
+        lats, lons, names, region_ids, codes = [], [], [], [], []
+        regions: Dict[str, int] = {}
+        for row in _read_tsv(path):
+            try:
+                lat, lon = float(row[_COL_LAT]), float(row[_COL_LON])
+                population = int(row[_COL_POPULATION] or 0)
+            except (IndexError, ValueError):
+                continue
+            if population < min_population:
+                continue
+            code = row[_COL_COUNTRY]
+            region = admin1.get(f"{code}.{row[_COL_ADMIN1]}")
+            lats.append(lat)
+            lons.append(lon)
+            names.append(row[_COL_NAME])
+            region_ids.append(regions.setdefault(region, len(regions)) if region else -1)
+            codes.append(code)
+
+        # Tri dans l'ordre de la grille, pour que l'index rechargé n'ait rien à réordonner
+        order = np.asarray(SpatialIndex(lats, lons, cell_deg=cell_deg).ids, dtype=np.int64)
+        names_blob, name_offsets = _pack([names[i] for i in order])
+        regions_blob, region_offsets = _pack(sorted(regions, key=regions.get))
+        return cls(
+            np.asarray(lats, dtype=np.float64)[order],
+            np.asarray(lons, dtype=np.float64)[order],
+            names_blob,
+            name_offsets,
+            regions_blob,
+            region_offsets,
+            np.asarray(region_ids, dtype=np.int32)[order],
+            np.asarray(codes, dtype="S2")[order],
+            countries,
+            cell_deg,
+        )
+
+    def save(self, folder=GEOCODER_PATH) -> None:
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "lats": self._lats,
+            "lons": self._lons,
+            "names": self._names,
+            "name_offsets": self._name_offsets,
+            "regions": self._regions,
+            "region_offsets": self._region_offsets,
+            "region_ids": self._region_ids,
+            "country_codes": self._country_codes,
+        }
+        for name, values in arrays.items():
+            np.save(folder / f"{name}.npy", values)
+        with open(folder / "index.json", "w", encoding="utf-8") as f:
+            json.dump({"cell_deg": self.cell_deg, "countries": self.countries}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, folder=GEOCODER_PATH) -> Optional["ReverseGeocoder"]:
+        """Charge l'index (tableaux en mmap), ou None s'il n'a pas été construit."""
+        folder = Path(folder)
+        if not (folder / "index.json").exists():
+            return None
+        with open(folder / "index.json", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        def load(name):
+            return np.load(folder / f"{name}.npy", mmap_mode="r")
+
+        return cls(
+            load("lats"),
+            load("lons"),
+            load("names"),
+            load("name_offsets"),
+            load("regions"),
+            load("region_offsets"),
+            load("region_ids"),
+            load("country_codes"),
+            meta["countries"],
+            meta["cell_deg"],
+        )
+
+    # ---------- Requêtes ----------
+
+    @staticmethod
+    def _string(blob, offsets, i: int) -> str:
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def lookup(self, lat: float, lon: float, max_km: float = DEFAULT_MAX_KM) -> Optional[Place]:
+        """Lieu connu le plus proche de (lat, lon), ou None s'il n'y en a aucun à moins de max_km."""
+        nearest = self.index.nearest(lat, lon, 1, max_km)
+        if not nearest:
+            return None
+        i, distance = nearest[0]
+        region = int(self._region_ids[i])
+        code = self._country_codes[i].decode("ascii")
+        return Place(
+            name=self._string(self._names, self._name_offsets, i),
+            region=self._string(self._regions, self._region_offsets, region) if region >= 0 else "",
+            country=self.countries.get(code, code),
+            country_code=code,
+            distance_km=distance,
+        )
+
+
+_default: Optional[ReverseGeocoder] = None
+
+
+def default_geocoder() -> ReverseGeocoder:
+    """Index du dossier par défaut, chargé une fois par processus ; FileNotFoundError s'il n'existe pas."""
+    global _default
+    if _default is None:
+        _default = ReverseGeocoder.load()
+        if _default is None:
+            raise FileNotFoundError(
+                f"Index géographique absent de {GEOCODER_PATH} : le construire avec python -m editor.geocoder"
+            )
+    return _default
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m editor.geocoder",
+                                     description="Construit l'index de géocodage inverse hors ligne.")
+    parser.add_argument("cities", help="Export GeoNames (cities500.txt, cities15000.txt, allCountries.txt...)")
+    parser.add_argument("--admin1", help="admin1CodesASCII.txt, pour les noms de régions")
+    parser.add_argument("--countries", help="countryInfo.txt, pour les noms de pays")
+    parser.add_argument("--min-population", type=int, default=0, help="Ignore les lieux moins peuplés")
+    parser.add_argument("--cell-deg", type=float, default=DEFAULT_CELL_DEG, help="Taille des cellules en degrés")
+    parser.add_argument("-o", "--output", default=str(GEOCODER_PATH), help="Dossier de l'index")
+    args = parser.parse_args(argv)
+
+    geocoder = ReverseGeocoder.from_geonames(
+        args.cities,
+        admin1=read_admin1(args.admin1) if args.admin1 else None,
+        countries=read_countries(args.countries) if args.countries else None,
+        min_population=args.min_population,
+        cell_deg=args.cell_deg,
+    )
+    geocoder.save(args.output)
+    print(f"{len(geocoder)} lieux -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# python
+"""
+Géolocalisation d'un lot de photos à partir d'une trace GPX ou CSV.
+
+La trace est lue en flux (iterparse / csv) dans des tableaux NumPy triés par temps ; chaque photo est
+placée par recherche dichotomique (searchsorted) puis interpolation linéaire entre les deux points
+qui l'encadrent, en une seule passe vectorisée sur toutes les photos.
+"""
+from __future__ import annotations
+
+import csv
+import os
+import xml.etree.ElementTree as ET
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from editor.geo import find_column
+
+# Écart maximal par défaut (secondes) entre une photo et les points de trace utilisés
+DEFAULT_MAX_GAP_S = 300.0
+
+_CSV_TIME_COLUMNS = ("time", "timestamp", "datetime", "date")
+_CSV_LAT_COLUMNS = ("lat", "latitude")
+_CSV_LON_COLUMNS = ("lon", "lng", "long", "longitude")
+
+
+def _parse_time(value: str) -> float:
+    """Horodatage ISO 8601 (Z ou décalage explicite, UTC sinon) ou epoch en secondes."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+@dataclass(frozen=True)
+class Track:
+    times: np.ndarray  # secondes UTC, triées
+    lats: np.ndarray
+    lons: np.ndarray
+
+    @classmethod
+    def from_arrays(cls, times, lats, lons) -> "Track":
+        times = np.asarray(times, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if times.size and np.any(np.diff(times) < 0):
+            order = np.argsort(times, kind="stable")
+            times, lats, lons = times[order], lats[order], lons[order]
+        return cls(times, lats, lons)
+
+    def __len__(self) -> int:
+        return int(self.times.size)
+
+    def locate(self, timestamps, max_gap_s: float = DEFAULT_MAX_GAP_S) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Positions aux instants donnés (secondes UTC). Renvoie (lats, lons, trouvé).
+        Si les deux points qui encadrent l'instant sont à moins de max_gap_s l'un de l'autre, la position
+        est interpolée ; sinon on prend le plus proche s'il est à moins de max_gap_s. Au-delà : non trouvé.
+        """
+        t = np.asarray(timestamps, dtype=np.float64)
+        n = self.times.size
+        if n == 0 or t.size == 0:
+            nan = np.full(t.shape, np.nan)
+            return nan, nan.copy(), np.zeros(t.shape, dtype=bool)
+
+        i1 = np.clip(np.searchsorted(self.times, t, side="left"), 0, n - 1)
+        i0 = np.clip(i1 - 1, 0, n - 1)
+        t0, t1 = self.times[i0], self.times[i1]
+
+        span = t1 - t0
+        inside = (t0 <= t) & (t <= t1) & (span > 0)
+        ratio = np.where(inside, (t - t0) / np.where(span > 0, span, 1.0), 0.0)
+
+        # Traversée de l'antiméridien : on interpole sur le plus court chemin
+        dlon = (self.lons[i1] - self.lons[i0] + 180.0) % 360.0 - 180.0
+        lats = self.lats[i0] + ratio * (self.lats[i1] - self.lats[i0])
+        lons = (self.lons[i0] + ratio * dlon + 180.0) % 360.0 - 180.0
+
+        d0, d1 = np.abs(t - t0), np.abs(t1 - t)
+        nearest = np.where(d1 < d0, i1, i0)
+        nearest_gap = np.minimum(d0, d1)
+        interpolate = inside & (span <= max_gap_s)
+
+        lats = np.where(interpolate, lats, self.lats[nearest])
+        lons = np.where(interpolate, lons, self.lons[nearest])
+        found = interpolate | (nearest_gap <= max_gap_s)
+        return lats, lons, found
+
+
+def load_gpx(path: str) -> Track:
+    times, lats, lons = array("d"), array("d"), array("d")
+    # Éléments ouverts, pour détacher chaque point lu de son parent (trkseg)
+    parents = []
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if tag != "trkpt":
+            continue
+        time_text = None
+        for child in elem:
+            if child.tag.rsplit("}", 1)[-1] == "time":
+                time_text = child.text
+                break
+        if time_text:
+            try:
+                t, lat, lon = _parse_time(time_text), float(elem.attrib["lat"]), float(elem.attrib["lon"])
+            except (KeyError, ValueError):
+                t = None
+            if t is not None:
+                times.append(t)
+                lats.append(lat)
+                lons.append(lon)
+        # Point lu retiré de l'arbre : la mémoire reste bornée même pour des millions de points
+        if parents:
+            parents[-1].remove(elem)
+    return Track.from_arrays(np.frombuffer(times), np.frombuffer(lats), np.frombuffer(lons))
+
+
+def load_csv(path: str) -> Track:
+    times, lats, lons = array("d"), array("d"), array("d")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f, csv.Sniffer().sniff(f.read(4096), delimiters=",;\t"))
+        f.seek(0)
+        header = [h.strip().lower() for h in next(reader)]
+
+        source = os.path.basename(path)
+        i_time = find_column(header, _CSV_TIME_COLUMNS, source)
+        i_lat = find_column(header, _CSV_LAT_COLUMNS, source)
+        i_lon = find_column(header, _CSV_LON_COLUMNS, source)
+        for row in reader:
+            try:
+                t = _parse_time(row[i_time])
+                lat, lon = float(row[i_lat]), float(row[i_lon])
+            except (IndexError, ValueError):
+                continue
+            times.append(t)
+            lats.append(lat)
+            lons.append(lon)
+    return Track.from_arrays(np.frombuffer(times), np.frombuffer(lats), np.frombuffer(lons))
+
+
+def load_track(path: str) -> Track:
+    if os.path.splitext(path)[1].lower() == ".gpx":
+        return load_gpx(path)
+    return load_csv(path)
+
+
+def photo_timestamp(date: Optional[datetime], offset_s: float = 0.0) -> float:
+    """
+    Instant UTC d'une date EXIF (heure locale de l'appareil, sans fuseau).
+    offset_s est ajouté à l'heure de l'appareil pour obtenir l'UTC (appareil en UTC+2 : -7200).
+    """
+    if date is None:
+        return float("nan")
+    return date.replace(tzinfo=timezone.utc).timestamp() + offset_s
@@ -0,0 +1,121 @@
+# python
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from PIL import ExifTags, Image, ImageOps
+
+from editor.exif_utils import SWAPPED_ORIENTATIONS
+
+CacheKey = Tuple[str, int]
+
+
+# Réduction entière (Image.reduce, moyenne par blocs) avant le rééchantillonnage final :
+# le filtre coûteux ne travaille plus que sur une image au plus 2x plus grande que la cible
+REDUCING_GAP = 2.0
+
+
+def load_display_image(path: str, max_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """
+    Décode l'image, la redresse selon l'orientation EXIF et en fait une copie d'affichage
+    réduite à max_size (taille de l'écran) si fourni.
+    Pour un JPEG, le décodeur travaille directement à l'échelle DCT 1/2, 1/4 ou 1/8 la plus petite
+    qui couvre encore max_size (Image.draft). Sans max_size, l'image est décodée en pleine résolution.
+    """
+    with Image.open(path) as image:
+        if max_size and image.format == "JPEG":
+            width, height = max_size
+            if image.getexif().get(ExifTags.Base.Orientation) in SWAPPED_ORIENTATIONS:
+                width, height = height, width
+            image.draft(None, (width, height))
+        image = ImageOps.exif_transpose(image)
+    if max_size:
+        image.thumbnail(max_size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+    return image
+
+
+class ImageCache:
+    """
+    LRU borné des images prêtes à afficher, indexé par (chemin, mtime).
+    Les voisines de l'image courante sont décodées en arrière-plan par un pool de threads, de sorte
+    que la navigation suivante/précédente tombe dans le cache.
+    """
+
+    def __init__(self, max_size: Optional[Tuple[int, int]] = None, capacity: int = 9, workers: int = 2):
+        self.max_size = max_size
+        self.capacity = capacity
+        self._images: "OrderedDict[CacheKey, Image.Image]" = OrderedDict()
+        self._pending: Dict[CacheKey, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    @staticmethod
+    def _key(path: str) -> CacheKey:
+        return path, os.stat(path).st_mtime_ns
+
+    def get(self, path: str) -> Image.Image:
+        """Renvoie l'image depuis le cache, attend un préchargement en cours ou la décode sinon."""
+        key = self._key(path)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                return image
+            future = self._pending.get(key)
+
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception:
+                pass  # on retente ci-dessous pour remonter l'erreur à l'appelant
+
+        image = load_display_image(path, self.max_size)
+        self._store(key, image)
+        return image
+
+    def prefetch(self, paths: Iterable[str]) -> None:
+        """Précharge les chemins donnés et annule les préchargements devenus inutiles."""
+        keys = []
+        for path in paths:
+            try:
+                keys.append(self._key(path))
+            except OSError:
+                continue
+
+        with self._lock:
+            wanted = set(keys)
+            for key, future in list(self._pending.items()):
+                if key not in wanted and future.cancel():
+                    del self._pending[key]
+
+            for key in keys:
+                if key in self._images or key in self._pending:
+                    continue
+                future = self._executor.submit(load_display_image, key[0], self.max_size)
+                future.add_done_callback(lambda f, k=key: self._on_prefetched(k, f))
+                self._pending[key] = future
+
+    def _on_prefetched(self, key: CacheKey, future: Future) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._store(key, future.result())
+
+    def _store(self, key: CacheKey, image: Image.Image) -> None:
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.capacity:
+                self._images.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._images.clear()
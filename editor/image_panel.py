@@ -3,10 +3,10 @@ from __future__ import annotations
 
 import os
 import shutil
-from typing import Optional, List
+from typing import Optional, List, Dict
 
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QPixmap, QIcon, QImage
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize
+from PyQt6.QtGui import QPixmap, QIcon, QImage, QGuiApplication
 from PyQt6.QtWidgets import (
     QWidget,
     QLabel,
@@ -17,15 +17,42 @@ from PyQt6.QtWidgets import (
     QFrame,
 )
 
-from PIL import Image, ImageOps
+from PIL import Image
 
 from editor import resource_path
 from editor.config_manager import ConfigManager
 from editor.shared_data import StyleData
 from editor.exif_editor_service import ExifEditorService
+from editor.folder_index import FolderIndex
+from editor.image_cache import ImageCache
 from editor.toast import Toast
 
 
+# Modes PIL lisibles tels quels par QImage : (format Qt, octets par pixel)
+_QIMAGE_FORMATS = {
+    "RGB": (QImage.Format.Format_RGB888, 3),
+    "RGBA": (QImage.Format.Format_RGBA8888, 4),
+    "L": (QImage.Format.Format_Grayscale8, 1),
+}
+
+
+def pil_to_qimage(image: Image.Image) -> QImage:
+    """
+    Construit un QImage à partir d'une seule copie des pixels (tobytes), que le QImage utilise
+    ensuite sans la recopier. Les images RGB, RGBA et L sont copiées telles quelles ; les autres
+    modes (P, CMYK, ...) sont d'abord convertis en RGB ou RGBA. La copie est rattachée au QImage
+    pour rester en vie aussi longtemps que lui.
+    """
+    if image.mode not in _QIMAGE_FORMATS:
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+    fmt, channels = _QIMAGE_FORMATS[image.mode]
+
+    data = image.tobytes()
+    qimg = QImage(data, image.width, image.height, image.width * channels, fmt)
+    qimg._buffer = data  # QImage ne copie pas les données passées au constructeur
+    return qimg
+
+
 class ImagePanel(QWidget):
     image_opened = pyqtSignal(str)  # path
     image_closed = pyqtSignal()
@@ -34,6 +61,10 @@ class ImagePanel(QWidget):
     save_requested = pyqtSignal()
     save_as_requested = pyqtSignal()
     autosave_requested = pyqtSignal()
+    image_saved = pyqtSignal(str, str)  # chemin enregistré, chemin final (après renommage)
+
+    PREFETCH_RADIUS = 2
+    SMOOTH_RENDER_DELAY_MS = 150
 
     def __init__(self, style: StyleData):
         super().__init__()
@@ -42,12 +73,28 @@ class ImagePanel(QWidget):
         self.exif_service = ExifEditorService(style)
         self.config = ConfigManager()
         self.config.load()
+        self.folder_index = FolderIndex()
+        self.image_cache = ImageCache(
+            max_size=self._screen_pixel_size(),
+            capacity=2 * self.PREFETCH_RADIUS + 3,
+        )
 
         self.image_list: List[str] = []
+        self._positions: Dict[str, int] = {}
         self.current_index: int = -1
         self.image_path: Optional[str] = None
         self.pil_image: Optional[Image.Image] = None
 
+        # Pixmap de l'image courante (converti une seule fois) et dernier rendu lissé
+        self._pixmap: Optional[QPixmap] = None
+        self._scaled_size: Optional[QSize] = None
+
+        # Pendant un redimensionnement : mise à l'échelle rapide, puis un seul passage lissé à la fin
+        self._smooth_timer = QTimer(self)
+        self._smooth_timer.setSingleShot(True)
+        self._smooth_timer.setInterval(self.SMOOTH_RENDER_DELAY_MS)
+        self._smooth_timer.timeout.connect(lambda: self._render_scaled(smooth=True))
+
         self._build_ui()
 
     def _build_ui(self) -> None:
@@ -164,31 +211,44 @@ class ImagePanel(QWidget):
         self.btn_prev.setIcon(icon("arrow_left.png"))
         self.btn_next.setIcon(icon("arrow_right.png"))
 
+    def _screen_pixel_size(self) -> Optional[tuple[int, int]]:
+        screen = QGuiApplication.primaryScreen()
+        if screen is None:
+            return None
+        size = screen.size()
+        ratio = screen.devicePixelRatio()
+        return int(size.width() * ratio), int(size.height() * ratio)
+
     def _set_image_visible(self, visible: bool) -> None:
         self.image_label.setVisible(visible)
         self.drop_hint.setVisible(not visible)
 
     def _pil_to_pixmap(self, image: Image.Image) -> QPixmap:
-        rgb = image.convert("RGBA")
-        data = rgb.tobytes("raw", "RGBA")
-        qimg = QImage(data, rgb.width, rgb.height, QImage.Format.Format_RGBA8888)
-        return QPixmap.fromImage(qimg)
+        return QPixmap.fromImage(pil_to_qimage(image))
 
     def resizeEvent(self, event) -> None:
         super().resizeEvent(event)
         if self.pil_image and self.image_label.isVisible():
-            self._render_scaled()
+            self._render_scaled(smooth=False)
+            self._smooth_timer.start()
+
+    def _set_pil_image(self, image: Optional[Image.Image]) -> None:
+        self.pil_image = image
+        self._pixmap = self._pil_to_pixmap(image) if image is not None else None
+        self._scaled_size = None
 
-    def _render_scaled(self) -> None:
-        pix = self._pil_to_pixmap(self.pil_image)
+    def _render_scaled(self, smooth: bool = True) -> None:
+        if self._pixmap is None:
+            return
         target = self.image_area.size()
-        scaled = pix.scaled(
-            target.width() - 20,
-            target.height() - 20,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
+        size = QSize(target.width() - 20, target.height() - 20)
+        if smooth and size == self._scaled_size:
+            return
+
+        mode = Qt.TransformationMode.SmoothTransformation if smooth else Qt.TransformationMode.FastTransformation
+        scaled = self._pixmap.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, mode)
         self.image_label.setPixmap(scaled)
+        self._scaled_size = size if smooth else None
 
     def open_file_dialog(self) -> None:
         path, _ = QFileDialog.getOpenFileName(
@@ -202,14 +262,15 @@ class ImagePanel(QWidget):
 
     def _build_image_list_from_path(self, image_path: str) -> None:
         folder = os.path.dirname(image_path)
-        images = [
-            os.path.join(folder, f)
-            for f in os.listdir(folder)
-            if os.path.splitext(f)[1].lower() in StyleData.EXTENSIONS_LIST
-        ]
-        images.sort(key=lambda x: os.path.getctime(x))
+        self._set_image_list(self.folder_index.list_images(folder))
+        if image_path not in self._positions:
+            # Fichier absent de l'index (ajouté pendant la fenêtre de résolution du FS) : scan complet
+            self._set_image_list(self.folder_index.list_images(folder, force_rescan=True))
+        self.current_index = self._positions[image_path]
+
+    def _set_image_list(self, images: List[str]) -> None:
         self.image_list = images
-        self.current_index = images.index(image_path)
+        self._positions = {p: i for i, p in enumerate(images)}
 
     def load_from_path(self, path: str) -> None:
         self.image_path = path
@@ -220,21 +281,34 @@ class ImagePanel(QWidget):
         if not self.image_path:
             return
         try:
-            image = Image.open(self.image_path)
-            image = ImageOps.exif_transpose(image)
-            self.pil_image = image
+            self._set_pil_image(self.image_cache.get(self.image_path))
 
             self._set_image_visible(True)
             self._render_scaled()
             self.image_opened.emit(self.image_path)
         except Exception as e:
             print(f"Erreur lors du chargement de l'image : {e}")
+        self._prefetch_neighbours()
+
+    def _prefetch_neighbours(self) -> None:
+        if not self.image_list or self.current_index < 0:
+            return
+        n = len(self.image_list)
+        indexes = []
+        for offset in range(1, self.PREFETCH_RADIUS + 1):
+            # Alternance suivante/précédente : les plus proches sont décodées en premier
+            indexes.append((self.current_index + offset) % n)
+            indexes.append((self.current_index - offset) % n)
+        paths = dict.fromkeys(self.image_list[i] for i in indexes if i != self.current_index)
+        self.image_cache.prefetch(paths)
 
     def close_image(self) -> None:
-        self.image_list = []
+        self._set_image_list([])
+        self.image_cache.clear()
         self.current_index = -1
         self.image_path = None
-        self.pil_image = None
+        self._smooth_timer.stop()
+        self._set_pil_image(None)
         self.image_label.setPixmap(QPixmap())
         self._set_image_visible(False)
         self.image_closed.emit()
@@ -283,7 +357,9 @@ class ImagePanel(QWidget):
             if final_path and final_path != self.image_path:
                 self.image_path = final_path
                 if 0 <= self.current_index < len(self.image_list):
+                    self._positions.pop(self.image_list[self.current_index], None)
                     self.image_list[self.current_index] = final_path
+                    self._positions[final_path] = self.current_index
 
     def _can_save(self, get_values_callable) -> bool:
         if not (self.image_path and self.pil_image):
@@ -310,6 +386,7 @@ class ImagePanel(QWidget):
             Toast(self.window(), self.style, "Problème avec la sauvegarde")
             return
         Toast(self.window(), self.style, "Image sauvegardée avec succès")
+        self.image_saved.emit(path, final_path)
         return final_path
 
     def set_model_loading(self, is_loading: bool) -> None:
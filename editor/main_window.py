@@ -1,9 +1,7 @@
 # python
 import os
-import queue
 
-import requests
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QAction, QKeySequence, QIcon, QColor, QPalette
 from PyQt6.QtWidgets import (
     QMainWindow,
@@ -19,13 +17,26 @@ from editor.shared_data import StyleData
 from editor.image_panel import ImagePanel
 from editor.metadata_panel import MetadataPanel
 from editor.map_panel import MapPanel
+from editor.photo_layer import PhotoLayerScanner
 from editor.specie_dialog import SpecieDialog
 
-from detect_specie.inference_worker import InferenceWorker
-from detect_specie.model_loader import ModelLoaderThread
+from detect_specie.inference_scheduler import InferenceScheduler
+from detect_specie.inference_server import InferenceServer
 from detect_specie.model_service import ModelService
 
 
+class _ModelEvents(QObject):
+    """
+    Remplace la queue des threads de detect_specie (qui n'appellent que put) : chaque événement
+    est émis comme signal Qt, donc livré aussitôt sur le thread de l'interface, sans sondage.
+    """
+    received = pyqtSignal(str, object)
+
+    def put(self, item) -> None:
+        event, payload = item
+        self.received.emit(event, payload)
+
+
 class MainWindow(QMainWindow):
     DEFAULT_HEIGHT = 800
     DEFAULT_WIDTH = 1200
@@ -46,24 +57,20 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(800, 600)
         self.setWindowIcon(QIcon(resource_path("assets/icon.png")))
 
-        # Modèle (comme Tk : threads + queue, mais piloté par un timer Qt)
-        self.model_queue = queue.Queue()
+        # Modèle : les threads et le serveur d'inférence postent leurs événements, livrés par signal Qt
+        self.model_events = _ModelEvents(self)
+        self.model_events.received.connect(self._on_model_event)
         self.model_service = ModelService()
-        self.class_mapping = None
-        self.transform = None
         self._origin_coords: tuple[float, float] | None = None  # NEW
 
-        loader = ModelLoaderThread(self.model_service, self.model_queue)
-        loader.start()
+        self.inference_scheduler = InferenceScheduler(self.model_service, self.model_events)
+        self.inference_server: InferenceServer | None = None
 
         self._build_ui()
         self._build_menu()
+        self._start_model_loader()
 
         QTimer.singleShot(0, self.restore_layout)
-        self._poll_timer = QTimer(self)
-        self._poll_timer.setInterval(200)
-        self._poll_timer.timeout.connect(self.check_model_queue)
-        self._poll_timer.start()
 
     def _build_ui(self) -> None:
         self.main_splitter = QSplitter(Qt.Orientation.Horizontal, self)
@@ -97,6 +104,11 @@ class MainWindow(QMainWindow):
 
         self.map_panel.coords_picked.connect(self._on_map_coords_picked)
         self.metadata_panel.metadata_changed.connect(self._on_metadata_changed)
+
+        # Couche de toutes les photos géolocalisées du dossier ouvert
+        self.photo_layer = PhotoLayerScanner(self.image_panel.folder_index, self)
+        self.photo_layer.points_ready.connect(self.map_panel.update_photos)
+        self.image_panel.image_saved.connect(self._on_image_saved)
         self.setAcceptDrops(True)
 
     def dragEnterEvent(self, event) -> None:
@@ -131,7 +143,9 @@ class MainWindow(QMainWindow):
 
     def _on_image_opened(self, path: str) -> None:
         self.setWindowTitle(os.path.basename(path))
-        self.metadata_panel.load_from_image(self.image_panel.pil_image, path)
+        self.inference_scheduler.drop_stale(path)
+        self.metadata_panel.load_from_path(path)
+        self.photo_layer.scan(os.path.dirname(path))
 
         self.map_panel.set_picking_enabled(True)
         self._update_marker_actions_enabled()
@@ -149,14 +163,19 @@ class MainWindow(QMainWindow):
 
     def _on_image_closed(self) -> None:
         self.setWindowTitle(self.DEFAULT_APP_TITLE)
+        self.inference_scheduler.cancel()
         self.metadata_panel.clear_all()
         self.map_panel.clear_markers()
+        self.photo_layer.scan(None)
 
         self._origin_coords = None  # NEW
 
         self.map_panel.set_picking_enabled(False)
         self._update_marker_actions_enabled()
 
+    def _on_image_saved(self, path: str, final_path: str) -> None:
+        self.photo_layer.update([final_path], removed=[path] if path != final_path else [])
+
     def _on_map_coords_picked(self, lat: float, lon: float) -> None:
         if not self.image_panel.image_path:
             return
@@ -210,6 +229,11 @@ class MainWindow(QMainWindow):
         self.act_switch_recognition.triggered.connect(self.switch_specie_recognition)
         menu_fenetre.addAction(self.act_switch_recognition)
 
+        # Précision du modèle : fp32 ou INT8 (plus rapide sur CPU)
+        self.act_switch_precision = QAction("", self)
+        self.act_switch_precision.triggered.connect(self.switch_model_precision)
+        menu_fenetre.addAction(self.act_switch_precision)
+
         self._refresh_switch_labels()
         self._refresh_theme_label()
         # Fichier
@@ -326,6 +350,10 @@ class MainWindow(QMainWindow):
         recog = self.config.get("recognition", self.style_data.DEFAULT_SPECIE)
         self.act_switch_recognition.setText(self.style_data.SPECIE_SWITCH_LABEL[recog])
 
+        precision = self.config.get("model_precision", self.style_data.DEFAULT_PRECISION)
+        self.act_switch_precision.setText(self.style_data.PRECISION_SWITCH_LABEL[precision])
+        self.act_switch_precision.setEnabled(bool(recog))
+
     def switch_map(self) -> None:
         old_map = self.config.get("map", self.style_data.DEFAULT_MAP)
         new_map = "international" if old_map == "french" else "french"
@@ -347,6 +375,26 @@ class MainWindow(QMainWindow):
         # si on réactive, on relance une détection si possible
         self._maybe_get_specie()
 
+    def switch_model_precision(self) -> None:
+        old = self.config.get("model_precision", self.style_data.DEFAULT_PRECISION)
+        self.config.set("model_precision", "int8" if old == "fp32" else "fp32")
+        self.config.save()
+        self._refresh_switch_labels()
+        self._start_model_loader()
+
+    def _start_model_loader(self) -> None:
+        precision = self.config.get("model_precision", self.style_data.DEFAULT_PRECISION)
+        self.model_service.ready = False
+        self.model_service.loading = True
+        self.image_panel.set_model_loading(True)
+
+        # Le modèle tourne dans un processus dédié : l'interface ne partage plus le GIL avec l'inférence
+        if self.inference_server is not None:
+            self.inference_server.close()
+        self.inference_server = InferenceServer(self.model_events, self.model_service, precision=precision)
+        self.model_service.server = self.inference_server
+        self.inference_server.start()
+
     def _about(self) -> None:
         from PyQt6.QtWidgets import QMessageBox
         QMessageBox.information(self, "À propos", "Éditeur Exif\nVersion 2.0.5\n© 2025 Jul SQL")
@@ -443,6 +491,10 @@ class MainWindow(QMainWindow):
         self.config.set("zoom", zoom)
         self.config.save()
 
+        self.inference_scheduler.cancel()
+        if self.inference_server is not None:
+            self.inference_server.close()
+
         super().closeEvent(event)
 
     # ---------- Reconnaissance espèce (threads existants) ----------
@@ -461,63 +513,27 @@ class MainWindow(QMainWindow):
         if coords:
             lat, lon = coords
 
-        worker = InferenceWorker(
-            self.model_service,
-            self.image_panel.image_path,
-            lat,
-            lon,
-            self.model_queue,
-            self.class_mapping,
-            self.transform,
-        )
-        worker.start()
-
-    def check_model_queue(self) -> None:
-        while not self.model_queue.empty():
-            event, payload = self.model_queue.get()
+        self.inference_scheduler.request(self.image_panel.image_path, lat, lon)
 
-            if event == "model_ready":
-                self.image_panel.set_model_loading(False)
-                import birder
-                self.class_mapping = {v: k for k, v in self.model_service.model_info.class_to_idx.items()}
-                size = birder.get_size_from_signature(self.model_service.model_info.signature)
-                self.transform = birder.classification_transform(size, self.model_service.model_info.rgb_stats)
+    def _on_model_event(self, event: str, payload) -> None:
+        if event == "model_ready":
+            self.image_panel.set_model_loading(False)
 
-            elif event == "inference_done":
-                self._on_specie_detected(payload)
+        elif event == "inference_done":
+            self._on_specie_detected(payload)
 
-            elif event in ("model_error", "inference_error"):
-                # On log, UX: silencieux comme avant (tu peux aussi ajouter un toast Qt ici)
-                print(payload)
+        elif event in ("model_error", "inference_error"):
+            # On log, UX: silencieux comme avant (tu peux aussi ajouter un toast Qt ici)
+            print(payload)
 
     def _on_specie_detected(self, payload: tuple) -> None:
-        (specie, path) = payload
+        (specie, path, url) = payload
         if self.image_panel.image_path != path:
             return
         if not specie or specie == "":
             InfoDialog(self, "Aucune espèce détectée", "Aucune espèce n'a été reconne.<br/>Essayer de recouper l'image,<br/>ou de mettre une localisation plus précise.").exec()
             return
         name_field = self.metadata_panel.entries["nom"].text()
-        url = self._get_inat_taxon_link(specie)
         dlg = SpecieDialog(self, specie, url, has_specie(name_field))
         if dlg.exec() == QDialog.DialogCode.Accepted:
             self.metadata_panel.set_name_prefix(specie)
-
-    def _get_inat_taxon_id(self, scientific_name: str) -> str | None:
-        url = "https://api.inaturalist.org/v1/taxa"
-        params = {"q": scientific_name, "rank": "species"}
-        try:
-            resp = requests.get(url, params=params, timeout=5)
-            resp.raise_for_status()
-            results = resp.json().get("results", [])
-            if results:
-                return str(results[0].get("id"))
-        except Exception:
-            return None
-        return None
-
-    def _get_inat_taxon_link(self, scientific_name: str) -> str | None:
-        taxon_id = self._get_inat_taxon_id(scientific_name)
-        if taxon_id:
-            return f"https://www.inaturalist.org/taxa/{taxon_id}"
-        return None
\ No newline at end of file
@@ -2,21 +2,38 @@
 from __future__ import annotations
 
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
-from PyQt6.QtCore import QObject, pyqtSlot, pyqtSignal, QUrl, QEvent
+from PyQt6.QtCore import QBuffer, QByteArray, QObject, QTimer, pyqtSlot, pyqtSignal, QUrl, QEvent
 from PyQt6.QtWebChannel import QWebChannel
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import (
     QWebEngineSettings,
     QWebEngineUrlRequestInterceptor,
+    QWebEngineUrlRequestJob,
+    QWebEngineUrlScheme,
+    QWebEngineUrlSchemeHandler,
 )
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
 
 from editor import resource_path
 from editor.config_manager import ConfigManager
-from editor.shared_data import StyleData
+from editor.shared_data import HTTP_REFERER, HTTP_USER_AGENT, StyleData
+from editor.tile_cache import TileCache, TileFetcher
+
+# Tuiles servies par le cache local : tiles://<fond de carte>/<z>/<x>/<y>.png
+TILE_SCHEME = b"tiles"
+
+
+def register_tile_scheme() -> None:
+    """À appeler avant la création de la QApplication."""
+    scheme = QWebEngineUrlScheme(TILE_SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.Flag.SecureScheme | QWebEngineUrlScheme.Flag.CorsEnabled)
+    QWebEngineUrlScheme.registerScheme(scheme)
 
 
 @dataclass
@@ -41,18 +58,79 @@ class _TileRequestInterceptor(QWebEngineUrlRequestInterceptor):
             info.setHttpHeader(b"User-Agent", self._user_agent.encode("utf-8"))
 
 
+class _TileSchemeHandler(QWebEngineUrlSchemeHandler):
+    """
+    Répond aux requêtes tiles:// : la lecture du cache et, au besoin, le téléchargement se font dans
+    un pool de threads, puis la réponse est rendue sur le thread de l'interface.
+    """
+    _tile_ready = pyqtSignal(int, object)
+
+    def __init__(self, fetcher: TileFetcher, workers: int = 4):
+        super().__init__()
+        self._fetcher = fetcher
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tiles")
+        self._jobs: dict[int, QWebEngineUrlRequestJob] = {}
+        self._next_id = 0
+        self._tile_ready.connect(self._reply)
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob) -> None:
+        url = job.requestUrl()
+        try:
+            z, x, y = (int(part) for part in url.path().strip("/").removesuffix(".png").split("/"))
+        except ValueError:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlInvalid)
+            return
+        source = url.host()
+
+        job_id = self._next_id
+        self._next_id += 1
+        self._jobs[job_id] = job
+        # La requête peut être annulée (déplacement de la carte) avant la réponse
+        job.destroyed.connect(lambda *_: self._jobs.pop(job_id, None))
+        self._executor.submit(lambda: self._tile_ready.emit(job_id, self._fetcher.fetch(source, z, x, y)))
+
+    def _reply(self, job_id: int, data: Optional[bytes]) -> None:
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        if data is None:
+            job.fail(QWebEngineUrlRequestJob.Error.RequestFailed)
+        else:
+            self._send(job, data)
+
+    @staticmethod
+    def _send(job: QWebEngineUrlRequestJob, data: bytes) -> None:
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(data))
+        job.reply(b"image/png", buffer)
+
+
 class _Bridge(QObject):
     coordsPicked = pyqtSignal(float, float)
     stateChanged = pyqtSignal(float, float, int)
+    # Couche des photos du dossier : un seul message JSON par lot de changements
+    photosChanged = pyqtSignal(str)
+    # Commandes de carte regroupées : [[nom, [arguments]], ...]
+    commands = pyqtSignal(str)
+    ready = pyqtSignal()
 
     def __init__(self, init_params: dict):
         super().__init__()
         self._init_params = init_params
+        self.photos: dict[str, tuple[float, float]] = {}
 
     @pyqtSlot(result="QVariant")
     def getInitParams(self):
         return self._init_params
 
+    @pyqtSlot()
+    def onReady(self):
+        self.ready.emit()
+
+    @pyqtSlot(result=str)
+    def getPhotos(self):
+        return json.dumps({"reset": True, "points": [[lat, lon, path] for path, (lat, lon) in self.photos.items()]})
+
     @pyqtSlot(float, float)
     def onCoordsPicked(self, lat: float, lon: float):
         self.coordsPicked.emit(lat, lon)
@@ -66,6 +144,21 @@ class MapPanel(QWidget):
     COORDINATES_PARIS = (48.8566, 2.3522)
     DEFAULT_ZOOM = 5
 
+    # Au plus un message de commandes par image affichée (~60 Hz), même touche suivante maintenue
+    FLUSH_INTERVAL_MS = 16
+
+    # Commandes en attente rendues inutiles par une nouvelle commande
+    _SUPERSEDED_BY = {
+        "setPickingEnabled": {"setPickingEnabled"},
+        "setTileUrl": {"setTileUrl"},
+        "setView": {"setView", "panTo"},
+        "panTo": {"panTo"},
+        "setOriginMarker": {"setOriginMarker"},
+        "setNewMarker": {"setNewMarker", "clearNewMarker"},
+        "clearNewMarker": {"setNewMarker", "clearNewMarker"},
+        "clearMarkers": {"setOriginMarker", "setNewMarker", "clearNewMarker", "clearMarkers"},
+    }
+
     coords_picked = pyqtSignal(float, float)
     file_dropped = pyqtSignal(QEvent)
 
@@ -76,10 +169,18 @@ class MapPanel(QWidget):
 
         self._last_state: Optional[MapState] = None
 
+        # Commandes envoyées à la page au plus une fois par tour de boucle d'événements
+        self._commands: list[tuple[str, list]] = []
+        self._page_ready = False
+        self._last_flush = 0.0
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self._flush_commands)
+
         position = self.config.get("position", self.COORDINATES_PARIS)
         zoom = self.config.get("zoom", self.DEFAULT_ZOOM)
         tile_key = self.config.get("map", self.style.DEFAULT_MAP)
-        tile_url = self.style.MAPS.get(tile_key, self.style.MAPS[self.style.DEFAULT_MAP])
+        tile_url = self._local_tile_url(self.style.MAPS.get(tile_key, self.style.MAPS[self.style.DEFAULT_MAP]))
 
         lat, lon = position if isinstance(position, (list, tuple)) and len(position) == 2 else self.COORDINATES_PARIS
 
@@ -105,15 +206,13 @@ class MapPanel(QWidget):
         settings.setAttribute(QWebEngineSettings.WebAttribute.LocalContentCanAccessFileUrls, True)
 
         profile = self.view.page().profile()
-        from editor.app import VERSION
-        user_agent = f"exif_tools/{VERSION} (+https://github.com/juliettedebono/exif_tools)"
-        profile.setHttpUserAgent(user_agent)
-        self._tile_interceptor = _TileRequestInterceptor(
-            referer="https://github.com/juliettedebono/exif_tools",
-            user_agent=user_agent,
-        )
+        profile.setHttpUserAgent(HTTP_USER_AGENT)
+        self._tile_interceptor = _TileRequestInterceptor(referer=HTTP_REFERER, user_agent=HTTP_USER_AGENT)
         profile.setUrlRequestInterceptor(self._tile_interceptor)
 
+        self._tile_handler = _TileSchemeHandler(TileFetcher(TileCache()))
+        profile.installUrlSchemeHandler(TILE_SCHEME, self._tile_handler)
+
         self.channel = QWebChannel(self.view.page())
         self.bridge = _Bridge(init_params)
         self.channel.registerObject("bridge", self.bridge)
@@ -130,6 +229,8 @@ class MapPanel(QWidget):
 
         self.bridge.coordsPicked.connect(self._on_coords_picked)
         self.bridge.stateChanged.connect(self._on_state_changed)
+        self.bridge.ready.connect(self._on_page_ready)
+        self.view.loadStarted.connect(self._on_load_started)
 
         self.setStyleSheet(f"background: {self.style.BG_COLOR};")
 
@@ -146,13 +247,39 @@ class MapPanel(QWidget):
 
         return super().eventFilter(obj, event)
 
+    def _on_load_started(self) -> None:
+        self._page_ready = False
+
     def _on_load_finished(self, ok: bool) -> None:
         # Par défaut: pas d'image ouverte => picking désactivé
         self.set_picking_enabled(False)
 
+    def _on_page_ready(self) -> None:
+        self._page_ready = True
+        self._schedule_flush()
+
+    def _send(self, name: str, *args) -> None:
+        """Met une commande en file ; celles qu'elle rend inutiles sont retirées."""
+        superseded = self._SUPERSEDED_BY.get(name, ())
+        self._commands = [c for c in self._commands if c[0] not in superseded]
+        self._commands.append((name, list(args)))
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if not self._page_ready or not self._commands or self._flush_timer.isActive():
+            return
+        elapsed_ms = (time.monotonic() - self._last_flush) * 1000
+        self._flush_timer.start(max(0, int(self.FLUSH_INTERVAL_MS - elapsed_ms)))
+
+    def _flush_commands(self) -> None:
+        if not self._page_ready or not self._commands:
+            return
+        commands, self._commands = self._commands, []
+        self._last_flush = time.monotonic()
+        self.bridge.commands.emit(json.dumps(commands))
+
     def set_picking_enabled(self, enabled: bool) -> None:
-        js = f"setPickingEnabled({str(bool(enabled)).lower()});"
-        self.view.page().runJavaScript(js)
+        self._send("setPickingEnabled", bool(enabled))
 
     def _on_coords_picked(self, lat: float, lon: float) -> None:
         self.coords_picked.emit(lat, lon)
@@ -160,26 +287,33 @@ class MapPanel(QWidget):
     def _on_state_changed(self, lat: float, lon: float, zoom: int) -> None:
         self._last_state = MapState(lat=lat, lon=lon, zoom=int(zoom))
 
+    def _local_tile_url(self, tile_url: str) -> str:
+        """Modèle d'URL passant par le cache local pour les fonds de carte connus."""
+        for key, url in self.style.MAPS.items():
+            if url == tile_url:
+                return f"{TILE_SCHEME.decode()}://{key}/{{z}}/{{x}}/{{y}}.png"
+        return tile_url
+
     def set_tile_url(self, tile_url: str) -> None:
-        self.view.page().runJavaScript(f"setTileUrl({json.dumps(tile_url)});")
+        self._send("setTileUrl", self._local_tile_url(tile_url))
 
     def set_view(self, lat: float, lon: float, zoom: int) -> None:
-        self.view.page().runJavaScript(f"setView({lat}, {lon}, {int(zoom)});")
+        self._send("setView", lat, lon, int(zoom))
 
     def pan_to(self, lat: float, lon: float) -> None:
-        self.view.page().runJavaScript(f"panTo({lat}, {lon});")
+        self._send("panTo", lat, lon)
 
     def set_origin_marker(self, lat: float, lon: float) -> None:
-        self.view.page().runJavaScript(f"setOriginMarker({lat}, {lon});")
+        self._send("setOriginMarker", lat, lon)
 
     def set_new_marker(self, lat: float, lon: float) -> None:
-        self.view.page().runJavaScript(f"setNewMarker({lat}, {lon});")
+        self._send("setNewMarker", lat, lon)
 
     def clear_new_marker(self) -> None:
-        self.view.page().runJavaScript("clearNewMarker();")
+        self._send("clearNewMarker")
 
     def clear_markers(self) -> None:
-        self.view.page().runJavaScript("clearMarkers();")
+        self._send("clearMarkers")
 
     def add_marker_center_of_map(self) -> None:
         js = "getCenter();"
@@ -197,6 +331,20 @@ class MapPanel(QWidget):
 
         self.view.page().runJavaScript(js, _cb)
 
+    def update_photos(self, reset: bool, points: list, removed: list) -> None:
+        """Applique un lot de changements à la couche des photos du dossier ([lat, lon, chemin])."""
+        if reset:
+            self.bridge.photos.clear()
+        for path in removed:
+            self.bridge.photos.pop(path, None)
+        for lat, lon, path in points:
+            self.bridge.photos[path] = (lat, lon)
+        self.bridge.photosChanged.emit(json.dumps({
+            "reset": reset,
+            "points": [list(p) for p in points],
+            "removed": list(removed),
+        }))
+
     def get_state_for_persist(self) -> Tuple[Tuple[float, float], int]:
         if self._last_state:
             return (self._last_state.lat, self._last_state.lon), int(self._last_state.zoom)
@@ -16,16 +16,7 @@ from PyQt6.QtWidgets import (
 
 from editor import resource_path
 from editor.shared_data import StyleData
-from editor.exif_utils import (
-    get_name,
-    get_format,
-    get_weight,
-    get_size,
-    get_device,
-    get_date_taken,
-    get_date_modify,
-    get_coordinates, has_specie,
-)
+from editor.exif_utils import read_metadata, with_name_prefix
 
 
 @dataclass(frozen=True)
@@ -230,26 +221,21 @@ class MetadataPanel(QWidget):
             self._set_ok()
             self.metadata_changed.emit()
 
-    def load_from_image(self, image, image_path: str) -> None:
+    def load_from_path(self, image_path: str) -> None:
+        # Lecture des en-têtes seulement : indépendant du décodage de l'image affichée
+        meta = read_metadata(image_path)
         data = {
-            "nom": get_name(image_path) if image_path else "",
-            "format": str(get_format(image) or ""),
-            "poids": get_weight(image_path) if image_path else "",
-            "dimensions": get_size(image) if image else "",
-            "appareil": str(get_device(image) or ""),
-            "date_creation": str(
-                get_date_taken(image, self.style.EXIF_DATE_FORMAT, self.style.DISPLAYED_DATE_FORMAT) or ""
-            ),
-            "date_modification": str(get_date_modify(image_path) if image_path else ""),
+            "nom": meta.name,
+            "format": str(meta.format or ""),
+            "poids": meta.weight,
+            "dimensions": meta.dimensions,
+            "appareil": str(meta.device or ""),
+            "date_creation": str(meta.date_taken or ""),
+            "date_modification": str(meta.date_modify),
+            "latitude": "" if meta.latitude is None else str(meta.latitude),
+            "longitude": "" if meta.longitude is None else str(meta.longitude),
         }
 
-        lat, lon = (None, None)
-        if image:
-            lat, lon = get_coordinates(image)
-
-        data["latitude"] = "" if lat is None else str(lat)
-        data["longitude"] = "" if lon is None else str(lon)
-
         self._data_snapshot = dict(data)
 
         for spec in self.FIELDS:
@@ -293,9 +279,4 @@ class MetadataPanel(QWidget):
         return lat, lon
 
     def set_name_prefix(self, prefix: str) -> None:
-        current = self.entries["nom"].text().strip()
-        if has_specie(current):
-            new_value = f"{prefix} {' '.join(current.split(" ")[2:])}".strip()
-        else:
-            new_value = f"{prefix} {current}".strip()
-        self.entries["nom"].setText(new_value)
+        self.entries["nom"].setText(with_name_prefix(self.entries["nom"].text(), prefix))
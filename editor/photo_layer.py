@@ -0,0 +1,98 @@
+# python
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from editor.folder_index import FolderIndex
+
+# [latitude, longitude, chemin] : format compact envoyé tel quel à la carte
+PhotoPoint = Tuple[float, float, str]
+
+
+class PhotoLayerScanner(QObject):
+    """
+    Lit en arrière-plan les coordonnées de toutes les photos d'un dossier pour la couche de la carte.
+    Les métadonnées viennent de FolderIndex : un dossier déjà vu est relu depuis l'index, sans ouvrir
+    les fichiers. Les résultats arrivent par signal sur le thread de l'interface, par paquets de
+    CHUNK_SIZE points ; un scan devenu obsolète (autre dossier ouvert) est abandonné.
+    """
+
+    CHUNK_SIZE = 5000
+
+    # (réinitialiser, points ajoutés ou modifiés, chemins retirés)
+    points_ready = pyqtSignal(bool, list, list)
+
+    def __init__(self, folder_index: FolderIndex, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.folder_index = folder_index
+        self._generation = 0
+        self._folder: Optional[str] = None
+        # Un seul thread : scans et mises à jour s'appliquent dans l'ordre où ils sont demandés
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="photo-layer")
+
+    def _point(self, path: str) -> Optional[PhotoPoint]:
+        try:
+            lat, lon = self.folder_index.get_metadata(path).coordinates
+        except Exception:
+            return None
+        if lat is None or lon is None:
+            return None
+        return lat, lon, path
+
+    def scan(self, folder: Optional[str]) -> None:
+        """Remplace la couche par les photos de folder (vide si None)."""
+        if folder == self._folder:
+            return
+        self._folder = folder
+        self._generation += 1
+        generation = self._generation
+
+        if not folder:
+            self.points_ready.emit(True, [], [])
+            return
+
+        def run() -> None:
+            try:
+                paths = self.folder_index.list_images(folder)
+            except OSError:
+                paths = []
+            chunk: List[PhotoPoint] = []
+            reset = True
+            for path in paths:
+                if generation != self._generation:
+                    return
+                point = self._point(path)
+                if point is not None:
+                    chunk.append(point)
+                if len(chunk) >= self.CHUNK_SIZE:
+                    self.points_ready.emit(reset, chunk, [])
+                    chunk, reset = [], False
+            if generation == self._generation and (chunk or reset):
+                self.points_ready.emit(reset, chunk, [])
+
+        self._executor.submit(run)
+
+    def update(self, paths: Iterable[str], removed: Iterable[str] = ()) -> None:
+        """Met à jour les photos enregistrées (et retire les anciens chemins d'un fichier renommé)."""
+        generation = self._generation
+        folder = self._folder
+        paths = [p for p in paths if os.path.dirname(p) == folder]
+        removed = list(removed)
+
+        def run() -> None:
+            if generation != self._generation:
+                return
+            points = []
+            for path in paths:
+                point = self._point(path)
+                if point is None:
+                    removed.append(path)
+                else:
+                    points.append(point)
+            self.points_ready.emit(False, points, removed)
+
+        self._executor.submit(run)
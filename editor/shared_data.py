@@ -1,4 +1,11 @@
 # python
+VERSION = "2.0.5"
+PROJECT_URL = "https://github.com/juliettedebono/exif_tools"
+# Identification auprès des serveurs de tuiles (la politique d'usage OSM demande un User-Agent explicite)
+HTTP_USER_AGENT = f"exif_tools/{VERSION} (+{PROJECT_URL})"
+HTTP_REFERER = PROJECT_URL
+
+
 class ImageData:
     def __init__(self):
         self.image_path = None
@@ -37,6 +44,7 @@ class StyleData:
     SELECT_CURSOR = "hand2"
     DEFAULT_MAP = "french"
     DEFAULT_SPECIE = True
+    DEFAULT_PRECISION = "fp32"
     MAPS = {"french": "https://a.tile.openstreetmap.fr/osmfr/{z}/{x}/{y}.png",
             "international": "https://a.tile.openstreetmap.org/{z}/{x}/{y}.png"}
     MAPS_SWITCH_LABEL = {
@@ -50,6 +58,11 @@ class StyleData:
         False: "Activer la reconnaissance d'espèce"
     }
 
+    PRECISION_SWITCH_LABEL = {
+        "fp32": "Reconnaissance rapide (modèle INT8)",
+        "int8": "Reconnaissance précise (modèle fp32)"
+    }
+
     def __init__(self, mode: str = "dark"):
         self.MODE = "dark"
         self.set_mode(mode)
@@ -0,0 +1,160 @@
+# python
+"""
+Index spatial des photos géolocalisées : requêtes par rectangle, par rayon et k plus proches voisins.
+
+Les points sont triés par cellule d'une grille régulière (cell_deg degrés). Une ligne de cellules
+consécutives correspond à une tranche contiguë des tableaux triés : une requête ne fait qu'une
+recherche dichotomique par ligne de la grille, puis un filtre vectorisé NumPy sur les candidats,
+au lieu de parcourir toutes les photos.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from editor.folder_index import FolderIndex
+from editor.geo import EARTH_RADIUS_KM, KM_PER_DEG, haversine_km
+
+# Demi-circonférence : aucun point n'est plus loin
+_MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+DEFAULT_CELL_DEG = 0.1
+
+
+class SpatialIndex:
+    def __init__(self, lats, lons, ids: Optional[Sequence] = None, cell_deg: float = DEFAULT_CELL_DEG):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if lons.size and (lons.min() < -180.0 or lons.max() >= 180.0):
+            lons = (lons + 180.0) % 360.0 - 180.0
+        self.cell_deg = cell_deg
+        self._cols = int(math.ceil(360 / cell_deg))
+        self._rows = int(math.ceil(180 / cell_deg))
+
+        cells = self._row(lats) * self._cols + self._col(lons)
+        ids = range(lats.size) if ids is None else ids
+        if np.all(cells[:-1] <= cells[1:]):
+            # Points déjà dans l'ordre de la grille (index rechargé) : aucune copie des tableaux
+            self._cells, self.lats, self.lons, self.ids = cells, lats, lons, ids
+            return
+        order = np.argsort(cells, kind="stable")
+        self._cells = cells[order]
+        self.lats = lats[order]
+        self.lons = lons[order]
+        self.ids = [ids[i] for i in order]
+
+    @classmethod
+    def from_folder(cls, folder: str, folder_index: Optional[FolderIndex] = None,
+                    cell_deg: float = DEFAULT_CELL_DEG) -> "SpatialIndex":
+        """Index des photos géolocalisées du dossier ; les identifiants sont les chemins."""
+        return cls.from_paths((folder_index or FolderIndex()).list_images(folder), folder_index, cell_deg)
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str], folder_index: Optional[FolderIndex] = None,
+                   cell_deg: float = DEFAULT_CELL_DEG) -> "SpatialIndex":
+        folder_index = folder_index or FolderIndex()
+        lats, lons, ids = [], [], []
+        for path in paths:
+            try:
+                lat, lon = folder_index.get_metadata(path).coordinates
+            except Exception:
+                continue
+            if lat is None or lon is None:
+                continue
+            lats.append(lat)
+            lons.append(lon)
+            ids.append(path)
+        return cls(lats, lons, ids, cell_deg)
+
+    def __len__(self) -> int:
+        return int(self.lats.size)
+
+    # ---------- Grille ----------
+
+    def _row(self, lats):
+        return np.clip(np.floor((lats + 90.0) / self.cell_deg), 0, self._rows - 1).astype(np.int64)
+
+    def _col(self, lons):
+        return np.floor((lons + 180.0) / self.cell_deg).astype(np.int64) % self._cols
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Positions des points des cellules couvrant le rectangle (min_lon > max_lon : traverse l'antiméridien)."""
+        if self.lats.size == 0:
+            return np.empty(0, dtype=np.int64)
+        row0, row1 = (int(r) for r in self._row(np.array([min_lat, max_lat])))
+        col0, col1 = (int(c) for c in self._col(np.array([min_lon, max_lon])))
+        # Le sens se lit sur les longitudes : deux bords dans la même colonne peuvent faire le tour du globe
+        if min_lon <= max_lon:
+            col_ranges = [(col0, col1)]
+        elif col0 > col1:
+            col_ranges = [(col0, self._cols - 1), (0, col1)]
+        else:
+            col_ranges = [(0, self._cols - 1)]
+
+        rows = np.arange(row0, row1 + 1, dtype=np.int64) * self._cols
+        starts, ends = [], []
+        for c0, c1 in col_ranges:
+            starts.append(np.searchsorted(self._cells, rows + c0, side="left"))
+            ends.append(np.searchsorted(self._cells, rows + c1, side="right"))
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        keep = ends > starts
+        if not keep.any():
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts[keep], ends[keep])])
+
+    # ---------- Requêtes ----------
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List:
+        """Identifiants des points du rectangle (min_lon > max_lon si le rectangle traverse l'antiméridien)."""
+        pos = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lats, lons = self.lats[pos], self.lons[pos]
+        inside = (lats >= min_lat) & (lats <= max_lat)
+        if min_lon <= max_lon:
+            inside &= (lons >= min_lon) & (lons <= max_lon)
+        else:
+            inside &= (lons >= min_lon) | (lons <= max_lon)
+        return [self.ids[i] for i in pos[inside]]
+
+    def _within(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, distances) des points à moins de radius_km."""
+        d_lat = radius_km / KM_PER_DEG
+        min_lat, max_lat = max(lat - d_lat, -90.0), min(lat + d_lat, 90.0)
+        # Écart de longitude maximal du cercle ; il fait le tour du globe s'il contient un pôle
+        angle = radius_km / EARTH_RADIUS_KM
+        cos_lat = math.cos(math.radians(lat))
+        if abs(lat) + d_lat >= 90.0 or angle >= math.pi / 2 or math.sin(angle) >= cos_lat:
+            min_lon, max_lon = -180.0, 180.0 - 1e-9
+        else:
+            d_lon = math.degrees(math.asin(math.sin(angle) / cos_lat))
+            min_lon = (lon - d_lon + 180.0) % 360.0 - 180.0
+            max_lon = (lon + d_lon + 180.0) % 360.0 - 180.0
+
+        pos = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        dist = haversine_km(lat, lon, self.lats[pos], self.lons[pos])
+        inside = dist <= radius_km
+        return pos[inside], dist[inside]
+
+    def radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[object, float]]:
+        """(identifiant, distance en km) des points à moins de radius_km, du plus proche au plus loin."""
+        pos, dist = self._within(lat, lon, radius_km)
+        order = np.argsort(dist, kind="stable")
+        return [(self.ids[pos[i]], float(dist[i])) for i in order]
+
+    def nearest(self, lat: float, lon: float, k: int = 1, max_km: float = _MAX_DISTANCE_KM) -> List[Tuple[object, float]]:
+        """Les k points les plus proches (identifiant, distance en km), dans un rayon de max_km."""
+        if k <= 0 or self.lats.size == 0:
+            return []
+        # Rayon doublé jusqu'à contenir k points : les k plus proches du disque sont alors exacts
+        radius_km = min(self.cell_deg * KM_PER_DEG, max_km)
+        while True:
+            pos, dist = self._within(lat, lon, radius_km)
+            if pos.size >= k or radius_km >= max_km:
+                break
+            radius_km = min(radius_km * 2, max_km)
+        if pos.size > k:
+            top = np.argpartition(dist, k - 1)[:k]
+            pos, dist = pos[top], dist[top]
+        order = np.argsort(dist, kind="stable")
+        return [(self.ids[pos[i]], float(dist[i])) for i in order]
@@ -0,0 +1,215 @@
+# python
+"""
+Cache local des tuiles de carte, pour une carte utilisable hors connexion.
+
+Les tuiles sont stockées dans une base SQLite au schéma inspiré de MBTiles (une colonne source en
+plus : plusieurs fonds de carte partagent la base). Une tuile encore fraîche est servie sans réseau ;
+une tuile périmée est revalidée par requête conditionnelle (If-None-Match / If-Modified-Since) ;
+sans réseau, la dernière version connue est servie. La taille totale est plafonnée : les tuiles les
+moins récemment affichées sont évincées.
+
+Le cache ne se remplit qu'au fil de la navigation : les serveurs OSM configurés interdisent le
+téléchargement massif de zones à l'avance.
+"""
+from __future__ import annotations
+
+import email.utils
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from editor.shared_data import HTTP_REFERER, HTTP_USER_AGENT, StyleData
+
+TILE_CACHE_PATH = Path.home() / ".exiftools" / "tiles.mbtiles"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Durée de fraîcheur quand le serveur n'envoie pas de Cache-Control (politique OSM : au moins 7 jours)
+DEFAULT_MAX_AGE_S = 7 * 24 * 3600
+# Après dépassement du plafond, on évince jusqu'à cette fraction pour ne pas évincer à chaque tuile
+_EVICT_TARGET = 0.9
+# Dates de dernière utilisation écrites par lots : une tuile servie du cache ne coûte pas une transaction
+_TOUCH_BATCH = 64
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass(frozen=True)
+class CachedTile:
+    data: bytes
+    fresh: bool
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class TileCache:
+    def __init__(self, path: Path = TILE_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # En WAL, NORMAL ne synchronise le disque qu'aux checkpoints : une coupure perd au pire des tuiles
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (
+                source TEXT NOT NULL,
+                zoom_level INTEGER NOT NULL,
+                tile_column INTEGER NOT NULL,
+                tile_row INTEGER NOT NULL,
+                tile_data BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (source, zoom_level, tile_column, tile_row)
+            );
+            CREATE INDEX IF NOT EXISTS tiles_last_used ON tiles (last_used);
+            INSERT OR IGNORE INTO metadata (name, value) VALUES ('format', 'png');
+            """
+        )
+        self._conn.commit()
+        self._touched: dict = {}
+        self._total = self._conn.execute("SELECT COALESCE(SUM(LENGTH(tile_data)), 0) FROM tiles").fetchone()[0]
+
+    @staticmethod
+    def _tms_row(z: int, y: int) -> int:
+        # MBTiles range les lignes dans l'ordre TMS (origine en bas), les URL XYZ en haut
+        return (1 << z) - 1 - y
+
+    def get(self, source: str, z: int, x: int, y: int) -> Optional[CachedTile]:
+        key = (source, z, x, self._tms_row(z, y))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tile_data, etag, last_modified, expires FROM tiles "
+                "WHERE source = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= _TOUCH_BATCH:
+                with self._conn:
+                    self._flush_touched()
+        data, etag, last_modified, expires = row
+        return CachedTile(bytes(data), expires >= time.time(), etag, last_modified)
+
+    def put(self, source: str, z: int, x: int, y: int, data: bytes,
+            etag: Optional[str] = None, last_modified: Optional[str] = None,
+            max_age_s: float = DEFAULT_MAX_AGE_S) -> None:
+        key = (source, z, x, self._tms_row(z, y))
+        now = time.time()
+        with self._lock, self._conn:
+            self._flush_touched()
+            old = self._conn.execute(
+                "SELECT LENGTH(tile_data) FROM tiles "
+                "WHERE source = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                key,
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tiles (source, zoom_level, tile_column, tile_row, tile_data, etag, "
+                "last_modified, expires, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, sqlite3.Binary(data), etag, last_modified, now + max_age_s, now),
+            )
+            self._total += len(data) - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def refresh(self, source: str, z: int, x: int, y: int, max_age_s: float = DEFAULT_MAX_AGE_S) -> None:
+        """Tuile revalidée (304) : seule sa date d'expiration change."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE tiles SET expires = ? WHERE source = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (time.time() + max_age_s, source, z, x, self._tms_row(z, y)),
+            )
+
+    def _flush_touched(self) -> None:
+        """Écrit les dates de dernière utilisation en attente (verrou pris, dans une transaction)."""
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE tiles SET last_used = ? WHERE source = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            [(used, *key) for key, used in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        """Supprime les tuiles les moins récemment utilisées jusqu'à repasser sous le plafond."""
+        target = self.max_bytes * _EVICT_TARGET
+        rows = self._conn.execute(
+            "SELECT rowid, LENGTH(tile_data) FROM tiles ORDER BY last_used"
+        )
+        doomed = []
+        for rowid, size in rows:
+            if self._total <= target:
+                break
+            doomed.append((rowid,))
+            self._total -= size
+        self._conn.executemany("DELETE FROM tiles WHERE rowid = ?", doomed)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+
+def _max_age(headers) -> float:
+    match = _MAX_AGE_RE.search(headers.get("Cache-Control", ""))
+    if match:
+        return max(float(match.group(1)), 0.0)
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return max(email.utils.parsedate_to_datetime(expires).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            pass
+    return DEFAULT_MAX_AGE_S
+
+
+class TileFetcher:
+    """Tuiles d'une source (modèle d'URL {z}/{x}/{y}) via le cache, le réseau n'étant sollicité qu'au besoin."""
+
+    def __init__(self, cache: TileCache, sources: Optional[dict] = None, timeout: float = 10):
+        self.cache = cache
+        self.sources = dict(StyleData.MAPS if sources is None else sources)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": HTTP_USER_AGENT, "Referer": HTTP_REFERER})
+
+    def fetch(self, source: str, z: int, x: int, y: int) -> Optional[bytes]:
+        """Octets PNG de la tuile, ou None si elle est inconnue du cache et injoignable."""
+        cached = self.cache.get(source, z, x, y)
+        if cached is not None and cached.fresh:
+            return cached.data
+
+        template = self.sources.get(source)
+        if template is None:
+            return cached.data if cached else None
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        try:
+            resp = self.session.get(template.format(z=z, x=x, y=y), headers=headers, timeout=self.timeout)
+            if resp.status_code == 304 and cached is not None:
+                self.cache.refresh(source, z, x, y, _max_age(resp.headers))
+                return cached.data
+            resp.raise_for_status()
+        except requests.RequestException:
+            # Hors connexion : une tuile périmée vaut mieux qu'une carte vide
+            return cached.data if cached else None
+
+        self.cache.put(
+            source, z, x, y, resp.content,
+            resp.headers.get("ETag"), resp.headers.get("Last-Modified"), _max_age(resp.headers),
+        )
+        return resp.content
@@ -1,9 +1,14 @@
-from editor.app import main_qt
+import multiprocessing
 
 
 def main():
+    # Importé ici : le processus d'inférence (spawn) réexécute ce module sans charger Qt
+    from editor.app import main_qt
+
     main_qt()
 
 
 if __name__ == "__main__":
+    # Requis par le serveur d'inférence (processus "spawn") dans l'exécutable PyInstaller
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,89 @@
+import struct
+
+import piexif
+import pytest
+from PIL import Image
+
+from editor.exif_writer import EXIF_PADDING, write_exif
+
+
+def _exif(make: bytes) -> bytes:
+    return piexif.dump({"0th": {piexif.ImageIFD.Make: make}})
+
+
+def _app1(data: bytes):
+    """(position, longueur totale) du segment APP1 Exif d'un JPEG."""
+    pos = 2
+    while data[pos:pos + 2] != b"\xff\xda":
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if data[pos:pos + 2] == b"\xff\xe1" and data[pos + 4:pos + 10] == b"Exif\x00\x00":
+            return pos, length + 2
+        pos += 2 + length
+    return None
+
+
+def _image_data(data: bytes) -> bytes:
+    offset, length = _app1(data)
+    return data[offset + length:]
+
+
+@pytest.fixture
+def jpeg(tmp_path):
+    path = tmp_path / "photo.jpg"
+    Image.new("RGB", (32, 32), (200, 120, 40)).save(path, exif=_exif(b"Old"))
+    return path
+
+
+def test_rewrite_when_exif_does_not_fit(jpeg):
+    before = jpeg.read_bytes()
+    _, old_length = _app1(before)
+    exif_bytes = _exif(b"A much longer camera maker name")
+    assert len(exif_bytes) + 4 > old_length
+
+    write_exif(exif_bytes, str(jpeg))
+
+    after = jpeg.read_bytes()
+    assert _app1(after)[1] == len(exif_bytes) + 4 + EXIF_PADDING
+    assert _image_data(after) == _image_data(before)
+    assert piexif.load(str(jpeg))["0th"][piexif.ImageIFD.Make] == b"A much longer camera maker name"
+
+
+def test_in_place_patch_when_exif_fits_padded_segment(jpeg):
+    write_exif(_exif(b"Padded"), str(jpeg))
+    before = jpeg.read_bytes()
+
+    write_exif(_exif(b"Patched in place"), str(jpeg))
+
+    after = jpeg.read_bytes()
+    assert len(after) == len(before)
+    assert _app1(after) == _app1(before)
+    assert _image_data(after) == _image_data(before)
+    assert piexif.load(str(jpeg))["0th"][piexif.ImageIFD.Make] == b"Patched in place"
+
+
+def test_jpeg_without_exif_gets_a_segment(tmp_path):
+    path = tmp_path / "plain.jpg"
+    Image.new("RGB", (16, 16)).save(path)
+    write_exif(_exif(b"New"), str(path))
+    assert piexif.load(str(path))["0th"][piexif.ImageIFD.Make] == b"New"
+    assert Image.open(path).size == (16, 16)
+
+
+def test_non_jpeg_is_delegated_to_piexif(tmp_path):
+    webp = tmp_path / "photo.webp"
+    Image.new("RGB", (16, 16)).save(webp)
+    write_exif(_exif(b"Webp"), str(webp))
+    assert piexif.load(str(webp))["0th"][piexif.ImageIFD.Make] == b"Webp"
+
+    # piexif ne sait pas écrire dans un PNG : le fichier n'est pas modifié
+    png = tmp_path / "photo.png"
+    Image.new("RGB", (16, 16)).save(png)
+    original = png.read_bytes()
+    with pytest.raises(piexif.InvalidImageDataError):
+        write_exif(_exif(b"Png"), str(png))
+    assert png.read_bytes() == original
+
+
+def test_rejects_non_exif_data(jpeg):
+    with pytest.raises(ValueError):
+        write_exif(b"not exif", str(jpeg))
@@ -0,0 +1,91 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from detect_specie.inat_client import DiskCache, INatClient
+
+OBSERVED = {"Parus major"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        query = parse_qs(urlparse(self.path).query)
+        body = json.dumps({"total_results": 1 if query["taxon_name"][0] in OBSERVED else 0}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.requests = []
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _client(url, tmp_path, **kwargs):
+    return INatClient(base_url=url, cache_path=tmp_path / "inat.sqlite", rate_per_s=0, timeout=2, **kwargs)
+
+
+def test_cache_hit_skips_network(server, tmp_path):
+    client = _client(f"http://127.0.0.1:{server.server_port}", tmp_path)
+    assert client.is_observed("Parus major", 48.85, 2.35) is True
+    assert client.is_observed("Parus major", 48.85, 2.35) is True
+    assert client.is_observed("Turdus merula", 48.85, 2.35) is False
+    assert len(server.requests) == 2
+
+    # Cache disque relu par un nouveau client
+    reloaded = _client(f"http://127.0.0.1:{server.server_port}", tmp_path)
+    assert reloaded.is_observed("Parus major", 48.85, 2.35) is True
+    assert len(server.requests) == 2
+
+
+def test_expired_entry_is_fetched_again(server, tmp_path):
+    client = _client(f"http://127.0.0.1:{server.server_port}", tmp_path, ttl_s=0.05)
+    assert client.is_observed("Parus major", 48.85, 2.35) is True
+    time.sleep(0.1)
+    assert client.is_observed("Parus major", 48.85, 2.35) is True
+    assert len(server.requests) == 2
+
+
+def test_network_error_is_not_cached(server, tmp_path):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+    offline = _client(f"http://127.0.0.1:{closed_port}", tmp_path)
+    assert offline.is_observed("Parus major", 48.85, 2.35) is False
+    assert offline.taxon_id("Parus major") is None
+
+    online = _client(f"http://127.0.0.1:{server.server_port}", tmp_path)
+    assert online.is_observed("Parus major", 48.85, 2.35) is True
+    assert len(server.requests) == 1
+
+
+def test_memory_hits_count_for_disk_eviction(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = DiskCache(path, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == (True, 1)  # servi par le LRU mémoire
+    cache.put("c", 3)
+
+    reloaded = DiskCache(path, max_entries=2)
+    assert reloaded.get("a") == (True, 1)
+    assert reloaded.get("b") == (False, None)
+    assert reloaded.get("c") == (True, 3)
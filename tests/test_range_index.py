@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from detect_specie.range_index import SpeciesRangeIndex
+
+
+def test_prior_on_empty_index_is_neutral():
+    index = SpeciesRangeIndex.build([])
+    ids = index.taxon_ids(["Parus major", "Erithacus rubecula"])
+    assert np.array_equal(index.prior(ids, 48.85, 2.35), np.ones(2))
+
+
+def test_prior_weights_absent_and_unknown_taxa():
+    index = SpeciesRangeIndex.build([("Parus major", 48.85, 2.35), ("Passer domesticus", -33.9, 151.2)])
+    ids = index.taxon_ids(["Parus major", "Passer domesticus", "Unknown species"])
+    assert np.array_equal(index.prior(ids, 48.9, 2.3, absent_weight=0.01), [1.0, 0.01, 0.01])
+
+
+def test_from_csv_reports_missing_column(tmp_path):
+    path = tmp_path / "observations.csv"
+    path.write_text("scientific_name,latitude\nParus major,48.85\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Colonne manquante : longitude"):
+        SpeciesRangeIndex.from_csv(path)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from detect_specie.main import rank_specie
+from detect_specie.range_index import SpeciesRangeIndex
+
+CLASS_MAPPING = {0: "Aves_Paridae_Parus_major", 1: "Aves_Turdidae_Turdus_merula", 2: "Aves_Passeridae_Passer_domesticus"}
+
+
+def _sydney_only_index():
+    return SpeciesRangeIndex.build([(name, -33.87, 151.21) for name in ("Parus major", "Turdus merula")])
+
+
+def test_unobserved_top_class_is_rejected_like_location_check():
+    index = _sydney_only_index()
+    probs = np.array([0.9, 0.05, 0.05])
+    assert rank_specie(probs, 48.85, 2.35, CLASS_MAPPING, location_check=index.is_observed) == ("", 0.0)
+    assert rank_specie(probs, 48.85, 2.35, CLASS_MAPPING, range_index=index) == ("", 0.0)
+
+
+def test_observed_class_above_threshold_is_kept():
+    index = _sydney_only_index()
+    specie, score = rank_specie(np.array([0.25, 0.7, 0.05]), -33.9, 151.2, CLASS_MAPPING, range_index=index)
+    assert (specie, round(score, 6)) == ("Turdus merula", 0.7)
+
+
+def test_lower_ranked_observed_class_wins_over_unobserved_one():
+    index = SpeciesRangeIndex.build([("Turdus merula", 48.85, 2.35)])
+    probs = np.array([0.6, 0.3, 0.1])
+    expected = rank_specie(probs, 48.85, 2.35, CLASS_MAPPING, location_check=index.is_observed)
+    specie, score = rank_specie(probs, 48.85, 2.35, CLASS_MAPPING, range_index=index)
+    assert expected == ("Turdus merula", 0.3)
+    assert (specie, round(score, 6)) == expected
+
+
+def test_alignment_follows_the_class_mapping():
+    index = _sydney_only_index()
+    first = index.aligned_taxon_ids(CLASS_MAPPING, 3, lambda i, m: " ".join(m[i].split("_")[-2:]))
+    other = {0: "Aves_Passeridae_Passer_domesticus", 1: "Aves_Paridae_Parus_major", 2: "X_Y_Unknown_species"}
+    second = index.aligned_taxon_ids(other, 3, lambda i, m: " ".join(m[i].split("_")[-2:]))
+    assert first.tolist() == [0, 1, -1]
+    assert second.tolist() == [-1, 0, -1]
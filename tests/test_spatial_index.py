@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from editor.spatial_index import SpatialIndex, haversine_km
+
+
+@pytest.fixture(scope="module", params=[0.1, 1.0])
+def points(request):
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-89, 89, 50000)
+    lons = rng.uniform(-180, 180, 50000)
+    return lats, lons, SpatialIndex(lats, lons, cell_deg=request.param)
+
+
+def _expected_bbox(lats, lons, min_lat, min_lon, max_lat, max_lon):
+    inside = (lats >= min_lat) & (lats <= max_lat)
+    if min_lon <= max_lon:
+        inside &= (lons >= min_lon) & (lons <= max_lon)
+    else:
+        inside &= (lons >= min_lon) | (lons <= max_lon)
+    return sorted(np.nonzero(inside)[0].tolist())
+
+
+@pytest.mark.parametrize(
+    "box",
+    [
+        (45, 5, 50, 10),
+        (-10, 170, 10, -170),
+        # Traverse l'antiméridien avec les deux bords dans la même colonne de la grille
+        (-32.77, -103.20, 3.97, -103.49),
+    ],
+)
+def test_bbox_matches_linear_scan(points, box):
+    lats, lons, index = points
+    assert sorted(index.bbox(*box)) == _expected_bbox(lats, lons, *box)
+
+
+@pytest.mark.parametrize(
+    "lat, lon, radius_km",
+    [(45, 5, 300), (89.5, 0, 500), (0, 179.9, 400), (-71.15, -67.18, 1591), (10, 10, 15000)],
+)
+def test_radius_matches_linear_scan(points, lat, lon, radius_km):
+    lats, lons, index = points
+    expected = np.nonzero(haversine_km(lat, lon, lats, lons) <= radius_km)[0]
+    assert sorted(i for i, _ in index.radius(lat, lon, radius_km)) == sorted(expected.tolist())
+
+
+@pytest.mark.parametrize("lat, lon, k", [(45, 5, 10), (0, -179.99, 3), (-71.15, -67.18, 50)])
+def test_nearest_matches_linear_scan(points, lat, lon, k):
+    lats, lons, index = points
+    expected = np.argsort(haversine_km(lat, lon, lats, lons), kind="stable")[:k]
+    assert [i for i, _ in index.nearest(lat, lon, k)] == expected.tolist()
+
+
+def test_empty_index():
+    index = SpatialIndex([], [])
+    assert index.bbox(-90, -180, 90, 180) == []
+    assert index.nearest(0, 0, 3) == []